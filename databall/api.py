@@ -1,30 +1,202 @@
+import os
+import random
+import threading
+import time
 from functools import cache
 
 import pandas as pd
-from nba_api.stats.endpoints import CommonAllPlayers, LeagueGameLog
-from nba_api.stats.static.teams import get_teams as get_teams_static
 
+from databall import telemetry
 from databall.types import SeasonType, StatsType
 
+DEFAULT_ATTEMPTS = 5
+DEFAULT_BACKOFF = 2.0  # seconds before the first retry, doubled after each one
+DEFAULT_COOLDOWN = 60.0  # seconds every worker pauses once the circuit opens
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+DEFAULT_TIMEOUT = 30.0
+
+settings = {
+    # completed seasons never change, so their downloads can be kept on disk
+    "cache_dir": os.environ.get("DATABALL_CACHE_DIR"),
+    # point the endpoints at another server, such as a local fake of stats.nba.com
+    "base_url": os.environ.get("DATABALL_API_URL"),
+    "timeout": float(os.environ.get("DATABALL_API_TIMEOUT", DEFAULT_TIMEOUT)),
+    "attempts": DEFAULT_ATTEMPTS,
+    "backoff": DEFAULT_BACKOFF,
+    "cooldown": DEFAULT_COOLDOWN,
+    "failure_threshold": DEFAULT_FAILURE_THRESHOLD,
+}
+
+
+# shared by every thread downloading from stats.nba.com, so repeated failures pause
+# all of them instead of each one hammering a server that is already struggling
+class CircuitBreaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_until = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            delay = self.opened_until - time.monotonic()
+
+        if delay > 0:
+            telemetry.count("circuit_wait", delay)
+            time.sleep(delay)
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+
+            if self.failures >= settings["failure_threshold"]:
+                print(f"Pausing downloads for {settings['cooldown']} seconds")
+                self.opened_until = time.monotonic() + settings["cooldown"]
+                self.failures = 0
+                telemetry.count("circuit_opened")
+
+
+breaker = CircuitBreaker()
+
+
+# shared by every download worker, so requests are spaced by the jittered delay across
+# the whole pool instead of each worker keeping its own pace
+class RateLimiter:
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_request = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        # reserve the next slot under the lock but sleep outside it
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request)
+            self.next_request = start + self.delay * (random.random() + 0.5)
+
+        if start > now:
+            time.sleep(start - now)
+
+
+# call func with the attempt number until it succeeds, sleeping a jittered exponential
+# backoff between attempts and calling on_retry with the error before each sleep
+def retry(func, attempts, backoff, errors=(Exception,), on_retry=None):
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(attempt)
+        except errors as e:  # noqa: PERF203
+            if attempt == attempts:
+                raise
+
+            if on_retry is not None:
+                on_retry(e, attempt)
+
+            time.sleep(backoff * 2 ** (attempt - 1) * (random.random() + 0.5))
+
+    raise ValueError(f"Number of attempts should be positive, got {attempts}")
+
+
+# build an nba_api endpoint, which sends its request on creation, with a timeout and
+# retries behind the shared circuit breaker
+def fetch(endpoint_class, **kwargs):
+    from nba_api.stats.library.http import NBAStatsHTTP
+    from requests import RequestException
+
+    if settings["base_url"] is not None:
+        NBAStatsHTTP.base_url = settings["base_url"].rstrip("/") + "/{endpoint}"
+
+    # invalid or truncated JSON raises ValueError or KeyError while parsing
+    errors = (RequestException, ValueError, KeyError)
+
+    def request(attempt):
+        breaker.wait()
+
+        try:
+            with telemetry.span(
+                "request", endpoint=endpoint_class.__name__, attempt=attempt
+            ):
+                endpoint = endpoint_class(timeout=settings["timeout"], **kwargs)
+        except errors:
+            breaker.failure()
+            raise
+
+        breaker.success()
+        return endpoint
+
+    def retrying(error, attempt):
+        print(f"{endpoint_class.__name__} failed ({type(error).__name__}), retrying")
+        telemetry.count("retries")
+
+    return retry(
+        request, settings["attempts"], settings["backoff"], errors, on_retry=retrying
+    )
+
 
 @cache
 def _get_stats(season, season_type, stats_type, **kwargs):
-    season_str = f"{season} {season_type.value.lower()}"
-    print(f"Downloading {season_str} {stats_type.name.lower()} stats")
-    stats = LeagueGameLog(
+    from databall.constants import CURRENT_SEASON
+
+    cache_dir = settings["cache_dir"]
+
+    if cache_dir is None or season >= CURRENT_SEASON:
+        return _download_stats(season, season_type, stats_type, **kwargs)
+
+    from databall.cache import FeatureCache
+
+    key = FeatureCache.key(
         season=season,
-        season_type_all_star=season_type.value,
-        player_or_team_abbreviation=stats_type.value,
+        season_type=season_type.name,
+        stats_type=stats_type.name,
         **kwargs,
     )
-    stats = stats.get_data_frames()[0]
+    return FeatureCache(cache_dir).get_or_compute(
+        key, lambda: _download_stats(season, season_type, stats_type, **kwargs)
+    )
+
+
+def _download_stats(season, season_type, stats_type, **kwargs):
+    # nba_api.stats.endpoints imports every endpoint, so only load the one used here
+    from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
+
+    season_str = f"{season} {season_type.value.lower()}"
+    print(f"Downloading {season_str} {stats_type.name.lower()} stats")
+
+    with telemetry.span(
+        "download",
+        endpoint="LeagueGameLog",
+        season=season,
+        season_type=season_type.name,
+        stats_type=stats_type.name,
+    ) as span:
+        endpoint = fetch(
+            LeagueGameLog,
+            season=season,
+            season_type_all_star=season_type.value,
+            player_or_team_abbreviation=stats_type.value,
+            **kwargs,
+        )
+        stats = endpoint.get_data_frames()[0]
+        span.count("rows", len(stats))
+        span.count("bytes", len(endpoint.nba_response.get_response()))
+
     stats.columns = stats.columns.str.lower()
     return stats
 
 
 def get_players(**kwargs):
+    from nba_api.stats.endpoints.commonallplayers import CommonAllPlayers
+
     print("Downloading players")
-    players = CommonAllPlayers(**kwargs).get_data_frames()[0]
+
+    with telemetry.span("download", endpoint="CommonAllPlayers") as span:
+        endpoint = fetch(CommonAllPlayers, **kwargs)
+        players = endpoint.get_data_frames()[0]
+        span.count("rows", len(players))
+        span.count("bytes", len(endpoint.nba_response.get_response()))
+
     players.columns = players.columns.str.lower()
     return players
 
@@ -34,6 +206,8 @@ def get_player_stats(season, season_type=SeasonType.REGULAR, **kwargs):
 
 
 def get_teams():
+    from nba_api.stats.static.teams import get_teams as get_teams_static
+
     print("Downloading teams")
     return pd.DataFrame(get_teams_static())
 
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from databall.profit import bankroll
+from databall.simulate import simulate
+from databall.util import stat_names
+
+# feature frame shared with backtest worker processes
+_shared = {}
+
+
+def backtest(
+    database,
+    models,
+    seasons,
+    windows,
+    predictors=None,
+    output="HOME_SPREAD_WL",
+    n_jobs=None,
+    **kwargs,
+):
+    if predictors is None:
+        predictors = stat_names()
+
+    if not isinstance(models, dict):
+        models = {type(model).__name__: model for model in models}
+
+    results = []
+
+    for window in windows:
+        # features depend only on the window, so every model and season reuses them
+        start = time.perf_counter()
+        data = database.betting_stats(window=window)
+        data = data.dropna(subset=predictors + [output])
+        feature_time = time.perf_counter() - start
+
+        run = partial(run_backtest, predictors=predictors, output=output, **kwargs)
+        jobs = list(product(models.items(), seasons))
+
+        if n_jobs is None or n_jobs == 1:
+            rows = [run(name, model, season, data) for (name, model), season in jobs]
+        else:
+            with ProcessPoolExecutor(
+                n_jobs, initializer=_share, initargs=(data,)
+            ) as pool:
+                futures = [
+                    pool.submit(_run_shared, run, name, model, season)
+                    for (name, model), season in jobs
+                ]
+                rows = [future.result() for future in futures]
+
+        for row in rows:
+            row.update(window=window, feature_time=feature_time)
+
+        results.extend(rows)
+
+    columns = ["window", "model", "season"]
+    results = pd.DataFrame(results)
+    return results[columns + [c for c in results.columns if c not in columns]]
+
+
+def run_backtest(name, model, season, data, predictors, output, **kwargs):
+    row = {
+        "model": name,
+        "season": season,
+        "games": 0,
+        "accuracy": np.nan,
+        "profit": 0.0,
+        "roi": np.nan,
+        "run_time": 0.0,
+    }
+
+    # seasons without games have nothing to simulate or score
+    if not (data.SEASON == season).any():
+        return row
+
+    start = time.perf_counter()
+    games = simulate(clone(model), data, season, predictors, output, **kwargs)
+    row["run_time"] = time.perf_counter() - start
+    final = bankroll(games, output).iloc[-1]
+    row.update(
+        games=len(games),
+        accuracy=final.cumulative_percent,
+        profit=final.cumulative_profit,
+        roi=final.roi,
+    )
+    return row
+
+
+def _run_shared(run, name, model, season):
+    return run(name, model, season, _shared["data"])
+
+
+def _share(data):
+    _shared["data"] = data
@@ -0,0 +1,92 @@
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m databall.benchmarks",
+        description="Time the databall hot paths on a synthetic SQLite database",
+    )
+    parser.add_argument("names", nargs="*", help="benchmarks to run, default all")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[2014, 2015, 2016])
+    parser.add_argument("--teams", type=int, default=30)
+    parser.add_argument("--players", type=int, default=13)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmarks.json")
+    parser.add_argument("--compare", help="previous report to compare against")
+    parser.add_argument("--list", action="store_true", help="list benchmarks")
+    parser.add_argument(
+        "--profile", action="store_true", help="attach cProfile and memory to spans"
+    )
+    parser.add_argument("--log", help="write span records to this JSON lines file")
+    parser.add_argument(
+        "--imports",
+        action="store_true",
+        help="check that heavy dependencies are imported lazily and exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.imports:
+        check_imports()
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the session engine is created when databall.db is first imported, so the
+        # scratch database has to be configured before that
+        dbfile = Path(directory, "databall.db").as_posix()
+        os.environ["DATABALL_DATABASE_URL"] = f"sqlite:///{dbfile}"
+
+        from databall import telemetry
+        from databall.benchmarks import suite
+
+        telemetry.enable_profiling(args.profile)
+
+        if args.log:
+            telemetry.log_to(args.log)
+
+        if args.list:
+            print("\n".join(suite.BENCHMARKS))
+            return
+
+        unknown = set(args.names) - set(suite.BENCHMARKS)
+
+        if unknown:
+            raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        workload = suite.Workload(
+            directory, args.seasons, args.teams, args.players, args.seed
+        )
+        report = suite.run(workload, args.names, args.repeat)
+        workload.close()
+
+    suite.save(report, args.output)
+    print(f"Saved results to {args.output}")
+
+    if args.compare:
+        print(suite.compare(suite.load(args.compare), report).to_string())
+
+
+def check_imports():
+    from databall.benchmarks import imports
+
+    for module, seconds in imports.measure().items():
+        if seconds is None:
+            print(f"{module:<28} {'failed':>10}")
+        else:
+            print(f"{module:<28} {seconds:10.4f} s")
+
+    errors = imports.check()
+
+    if errors:
+        raise SystemExit("\n".join(errors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+# heavy dependencies that importing each module must not pull in, since they are
+# only needed by the code paths that use them
+LAZY_IMPORTS = {
+    "databall.cli": ["scrapy", "nba_api", "pandas", "sqlalchemy", "sqlmodel"],
+    "databall.db": ["scrapy", "nba_api", "pandas", "sqlmodel"],
+    "databall.db.session": ["scrapy", "nba_api", "pandas", "sqlmodel"],
+    "databall.db.tables.covers": ["scrapy", "nba_api.stats.endpoints"],
+    "databall.api": ["nba_api.stats.endpoints"],
+    "databall.types": ["nba_api"],
+    "databall.util": ["IPython"],
+    "databall.plotting": ["matplotlib", "seaborn", "sklearn"],
+    "databall.simulate": ["hyperopt"],
+    "databall.model_selection": ["hyperopt"],
+    "databall.telemetry": ["pandas"],
+    "databall.team_stats": ["numpy", "pandas"],
+}
+
+
+# cumulative import time in seconds of every module loaded by a fresh interpreter
+def import_times(module):
+    try:
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+    except subprocess.CalledProcessError as error:
+        # keep the traceback's last line, the import time lines are just noise
+        message = error.stderr.strip().splitlines()[-1] if error.stderr else error
+        raise ImportError(f"{module} failed to import: {message}") from error
+
+    times = {}
+
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+
+    return times
+
+
+# modules that fail to import are timed as None
+def import_time(module):
+    try:
+        return import_times(module)[module]
+    except ImportError:
+        return None
+
+
+def measure(modules=LAZY_IMPORTS):
+    return {module: import_time(module) for module in modules}
+
+
+def check(lazy_imports=LAZY_IMPORTS):
+    errors = []
+
+    for module, forbidden in lazy_imports.items():
+        try:
+            loaded = import_times(module)
+        except ImportError as error:
+            errors.append(str(error))
+            continue
+
+        errors.extend(
+            f"{module} imports {name}"
+            for name in forbidden
+            if any(m == name or m.startswith(f"{name}.") for m in loaded)
+        )
+
+    return errors
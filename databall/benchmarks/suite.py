@@ -0,0 +1,357 @@
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from functools import cached_property, partial
+from pathlib import Path
+
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from databall import player_stats, stats, team_stats, telemetry
+from databall.benchmarks import synthetic
+from databall.database import Database
+from databall.profit import bankroll, profit
+from databall.simulate import simulate
+from databall.util import stat_names
+
+DEFAULT_REPEAT = 5
+DEFAULT_SEASONS = (2014, 2015, 2016)
+
+BENCHMARKS = {}
+
+
+# a benchmark receives the workload and returns the callable to time, so any setup
+# it does before returning is left out of the measurement
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+class Workload:
+    def __init__(
+        self,
+        directory,
+        seasons=DEFAULT_SEASONS,
+        teams=synthetic.MAX_TEAMS,
+        players=13,
+        seed=0,
+    ):
+        self.directory = Path(directory)
+        self.seasons = list(seasons)
+        self.scale = {"seasons": self.seasons, "teams": teams, "players": players}
+        self.tables = synthetic.generate(seasons, teams, players, seed=seed)
+
+        self.legacy_path = self.directory / "legacy.db"
+        synthetic.write_legacy(self.tables, self.legacy_path)
+
+    @cached_property
+    def database(self):
+        return Database(self.legacy_path)
+
+    @cached_property
+    def game_stats(self):
+        return self.database.game_stats()
+
+    @cached_property
+    def betting_stats(self):
+        return self.database.betting_stats(window=10)
+
+    @cached_property
+    def simulation(self):
+        return simulate(
+            LogisticRegression(),
+            self.betting_stats.dropna(),
+            self.seasons[-1],
+            stat_names(),
+            "HOME_SPREAD_WL",
+        )
+
+    @cached_property
+    def player_game_stats(self):
+        totals = self.tables["team_stats"].copy()
+        totals.columns = totals.columns.str.upper()
+        team = totals.add_prefix("TEAM_")
+        opp = totals.add_prefix("OPP_")
+
+        data = self.tables["player_stats"].copy()
+        data.columns = data.columns.str.upper()
+        data = data.merge(
+            team,
+            left_on=["GAME_ID", "TEAM_ID"],
+            right_on=["TEAM_GAME_ID", "TEAM_TEAM_ID"],
+        )
+        data = data.merge(opp, left_on="GAME_ID", right_on="OPP_GAME_ID")
+        return data[data.TEAM_ID != data.OPP_TEAM_ID].reset_index(drop=True)
+
+    # tables are created in the database configured through databall.db.session
+    @cached_property
+    def schema(self):
+        # every table has to be imported before create_all can see it
+        from databall.db import (  # noqa: F401
+            Covers,
+            Games,
+            Players,
+            PlayerStats,
+            Teams,
+            TeamStats,
+        )
+        from databall.db.base import Base
+        from databall.db.session import engine
+
+        # never drop tables outside of the scratch directory
+        path = Path(engine.url.database or "").resolve()
+
+        if self.directory.resolve() not in path.parents:
+            raise RuntimeError(
+                f"Set DATABALL_DATABASE_URL to a database in {self.directory}"
+            )
+
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+
+        for table in [Teams, Players, Games]:
+            self.tables[table.__tablename__].to_sql(
+                table.__tablename__, engine, if_exists="append", index=False
+            )
+
+        return engine
+
+    def close(self):
+        if "database" in self.__dict__:
+            self.database.close()
+
+        if "schema" in self.__dict__:
+            self.schema.dispose()
+
+    def truncate(self, table):
+        with self.schema.begin() as connection:
+            connection.execute(table.__table__.delete())
+
+
+@benchmark
+def game_stats(workload):
+    return workload.database.game_stats
+
+
+@benchmark
+def season_stats(workload):
+    return workload.database.season_stats
+
+
+@benchmark
+def windowed_stats(workload):
+    data = workload.game_stats
+    names = [c for c in data.columns if c.startswith(("TEAM_", "OPP_"))]
+    names.remove("OPP_ID")
+    return partial(workload.database.windowed_stats, data, names, window=10)
+
+
+@benchmark
+def betting_stats(workload):
+    return partial(workload.database.betting_stats, window=10)
+
+
+@benchmark
+def stats_formulas(workload):
+    return partial(apply_formulas, stats, workload.game_stats, group="TEAM_")
+
+
+@benchmark
+def team_stats_formulas(workload):
+    return partial(apply_formulas, team_stats, workload.game_stats)
+
+
+@benchmark
+def player_stats_formulas(workload):
+    return partial(apply_formulas, player_stats, workload.player_game_stats)
+
+
+@benchmark
+def save_team_stats(workload):
+    from databall.db import TeamStats
+
+    workload.truncate(TeamStats)
+    return partial(TeamStats.save_df, workload.tables["team_stats"])
+
+
+@benchmark
+def save_player_stats(workload):
+    from databall.db import PlayerStats
+
+    workload.truncate(PlayerStats)
+    return partial(PlayerStats.save_df, workload.tables["player_stats"])
+
+
+@benchmark
+def game_pipeline(workload):
+    from scrapy import Spider
+    from scrapy.utils.test import get_crawler
+
+    from databall.covers.pipelines import GamePipeline
+    from databall.db import Covers, TeamStats
+
+    # the pipeline checks scraped scores against the stored team stats
+    workload.truncate(TeamStats)
+    workload.tables["team_stats"].to_sql(
+        TeamStats.__tablename__, workload.schema, if_exists="append", index=False
+    )
+
+    workload.truncate(Covers)
+    spider = Spider.from_crawler(get_crawler(Spider), name="benchmark")
+    items = covers_items(workload.tables, workload.seasons[-1])
+    return partial(run_pipeline, GamePipeline(), spider, items)
+
+
+@benchmark
+def simulate_season(workload):
+    return partial(
+        simulate,
+        LogisticRegression(),
+        workload.betting_stats.dropna(),
+        workload.seasons[-1],
+        stat_names(),
+        "HOME_SPREAD_WL",
+    )
+
+
+@benchmark
+def bankroll_accounting(workload):
+    return partial(bankroll, workload.simulation)
+
+
+@benchmark
+def profit_curve(workload):
+    return partial(profit, workload.simulation)
+
+
+def apply_formulas(module, data, **kwargs):
+    return {
+        name: formula(data, **kwargs)
+        for name, formula in inspect.getmembers(module, inspect.isfunction)
+        if formula.__module__ == module.__name__
+    }
+
+
+def covers_items(tables, season):
+    games = tables["games"][tables["games"].season == season]
+    games = games.merge(tables["covers"], left_on="id", right_on="game_id")
+    abbreviations = tables["teams"].set_index("id").abbreviation
+    points = tables["team_stats"].set_index(["game_id", "team_id"]).pts
+
+    # the spider scrapes every team page, so each game is seen from both sides
+    return [
+        covers_item(game, home, abbreviations, points)
+        for game in games.itertuples()
+        for home in [True, False]
+    ]
+
+
+def covers_item(game, home, abbreviations, points):
+    team, opponent = game.home_team_id, game.away_team_id
+
+    if not home:
+        team, opponent = opponent, team
+
+    return {
+        "date": game.game_date,
+        "home": home,
+        "opponent": abbreviations[opponent],
+        "score": points[game.id, team],
+        "opponent_score": points[game.id, opponent],
+        "result": game.home_wl,
+        "spread": game.home_spread,
+        "spread_result": game.home_spread_result,
+        "over_under": game.over_under,
+        "over_under_result": game.over_under_result,
+    }
+
+
+def run_pipeline(pipeline, spider, items):
+    pipeline.open_spider(spider)
+
+    for item in items:
+        pipeline.process_item(item, spider)
+
+    pipeline.close_spider(spider)
+
+
+def measure(func, workload, repeat=DEFAULT_REPEAT):
+    times = []
+
+    for _ in range(repeat):
+        run = func(workload)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if repeat > 1 else 0.0,
+    }
+
+
+def run(workload, names=None, repeat=DEFAULT_REPEAT, verbose=True):
+    results = {}
+
+    for name in names or BENCHMARKS:
+        results[name] = measure(BENCHMARKS[name], workload, repeat)
+
+        if verbose:
+            print(f"{name:<24} {results[name]['median']:10.4f} s")
+
+    return {
+        "commit": commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": workload.scale,
+        "repeat": repeat,
+        "results": results,
+        "telemetry": telemetry.registry.summary().reset_index().to_dict("records"),
+    }
+
+
+def commit():
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.stdout.strip()
+
+
+def save(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ratio > 1 means the new report is slower
+def compare(old, new):
+    names = [name for name in new["results"] if name in old["results"]]
+    data = pd.DataFrame(
+        {
+            "old": [old["results"][name]["median"] for name in names],
+            "new": [new["results"][name]["median"] for name in names],
+        },
+        index=pd.Index(names, name="benchmark"),
+    )
+    data["ratio"] = data.new / data.old
+    return data
@@ -0,0 +1,235 @@
+import sqlite3
+import string
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+STAT_COLUMNS = [
+    "min",
+    "fgm",
+    "fga",
+    "fg3m",
+    "fg3a",
+    "ftm",
+    "fta",
+    "oreb",
+    "dreb",
+    "reb",
+    "ast",
+    "stl",
+    "blk",
+    "tov",
+    "pf",
+    "pts",
+    "plus_minus",
+]
+
+FIRST_TEAM_ID = 1610612737
+MAX_TEAMS = 30
+MIN_PER_GAME = 240
+
+
+# tables use the same lowercase columns as the nba_api game logs and databall.db
+def generate(seasons, teams=MAX_TEAMS, players=13, games=82, seed=0):
+    if teams % 2 != 0 or not 0 < teams <= MAX_TEAMS:
+        raise ValueError(f"Number of teams should be even and at most {MAX_TEAMS}")
+
+    rng = np.random.default_rng(seed)
+    team_ids = FIRST_TEAM_ID + np.arange(teams)
+    frames = [
+        season_frames(rng, season, team_ids, players, games) for season in seasons
+    ]
+
+    tables = {
+        name: pd.concat([frame[name] for frame in frames], ignore_index=True)
+        for name in ["games", "team_stats", "player_stats", "covers"]
+    }
+    tables["teams"] = team_frame(team_ids)
+    tables["players"] = player_frame(tables["player_stats"].player_id.unique())
+    return tables
+
+
+def season_frames(rng, season, team_ids, players, games):
+    # every team plays once a day against a random opponent
+    days = np.arange(games)
+    order = np.array([rng.permutation(team_ids) for _ in days])
+    home = order[:, 0::2].ravel()
+    away = order[:, 1::2].ravel()
+    num_games = len(home)
+
+    game_ids = [f"002{season % 100:02d}{i:05d}" for i in range(1, num_games + 1)]
+    dates = pd.Timestamp(f"{season}-10-20") + pd.to_timedelta(
+        np.repeat(days, len(team_ids) // 2), unit="D"
+    )
+
+    team_stats = box_scores(rng, 2 * num_games)
+    team_stats.insert(0, "game_id", np.concatenate([game_ids, game_ids]))
+    team_stats.insert(1, "team_id", np.concatenate([home, away]))
+    team_stats.insert(2, "season", season)
+    home_pts = team_stats.pts.to_numpy()[:num_games]
+    away_pts = team_stats.pts.to_numpy()[num_games:]
+    team_stats["plus_minus"] = np.concatenate(
+        [home_pts - away_pts, away_pts - home_pts]
+    )
+
+    margin = home_pts - away_pts
+    abbreviations = dict(zip(team_ids, abbreviation(team_ids - FIRST_TEAM_ID)))
+    games = pd.DataFrame(
+        {
+            "id": game_ids,
+            "home_team_id": home,
+            "away_team_id": away,
+            "season": season,
+            "season_type": "REGULAR",
+            "game_date": dates.date,
+            "matchup": [
+                f"{abbreviations[h]} vs. {abbreviations[a]}" for h, a in zip(home, away)
+            ],
+            # ties go to the home team since games cannot end in a draw
+            "home_wl": np.where(margin >= 0, "W", "L"),
+        }
+    )
+
+    return {
+        "games": games,
+        "team_stats": team_stats.sort_values(["game_id", "team_id"], ignore_index=True),
+        "player_stats": player_box_scores(rng, team_stats, players),
+        "covers": covers(rng, game_ids, margin, home_pts + away_pts),
+    }
+
+
+def box_scores(rng, size):
+    fga = rng.integers(75, 100, size)
+    fg3a = rng.binomial(fga, 0.35)
+    fg3m = rng.binomial(fg3a, 0.36)
+    fgm = fg3m + rng.binomial(fga - fg3a, 0.5)
+    fta = rng.poisson(22, size)
+    ftm = rng.binomial(fta, 0.77)
+    oreb = rng.poisson(10, size)
+    dreb = rng.poisson(34, size)
+
+    return pd.DataFrame(
+        {
+            "min": np.full(size, MIN_PER_GAME),
+            "fgm": fgm,
+            "fga": fga,
+            "fg3m": fg3m,
+            "fg3a": fg3a,
+            "ftm": ftm,
+            "fta": fta,
+            "oreb": oreb,
+            "dreb": dreb,
+            "reb": oreb + dreb,
+            "ast": rng.binomial(fgm, 0.6),
+            "stl": rng.poisson(8, size),
+            "blk": rng.poisson(5, size),
+            "tov": rng.poisson(14, size),
+            "pf": rng.poisson(20, size),
+            "pts": 2 * fgm + fg3m + ftm,
+            "plus_minus": np.zeros(size, dtype=int),
+        }
+    )
+
+
+# team totals are split between a fixed roster with one multinomial draw per stat
+def player_box_scores(rng, team_stats, players):
+    weights = rng.dirichlet(np.ones(players))
+    counts = ["min", "fgm", "fga", "fg3m", "fg3a", "ftm", "fta"]
+    counts += ["oreb", "dreb", "ast", "stl", "blk", "tov", "pf"]
+    split = {c: rng.multinomial(team_stats[c], weights).ravel() for c in counts}
+
+    data = pd.DataFrame(
+        {
+            "game_id": np.repeat(team_stats.game_id.to_numpy(), players),
+            "team_id": np.repeat(team_stats.team_id.to_numpy(), players),
+            "season": np.repeat(team_stats.season.to_numpy(), players),
+            "player_id": (
+                (team_stats.team_id.to_numpy()[:, None] - FIRST_TEAM_ID) * players
+                + np.arange(1, players + 1)
+            ).ravel(),
+            **split,
+        }
+    )
+    data["reb"] = data.oreb + data.dreb
+    data["pts"] = 2 * data.fgm + data.fg3m + data.ftm
+    data["plus_minus"] = np.repeat(team_stats.plus_minus.to_numpy(), players)
+    data = data[["game_id", "team_id", "season", "player_id"] + STAT_COLUMNS]
+    return data.sort_values(["game_id", "team_id", "player_id"], ignore_index=True)
+
+
+def covers(rng, game_ids, margin, total):
+    spread = np.clip(
+        np.round(2 * (rng.normal(0, 3, len(margin)) - margin / 2)) / 2, -29.5, 29.5
+    )
+    over_under = np.round(2 * (total + rng.normal(0, 10, len(total)))) / 2
+    over_under = np.clip(over_under, 100, 300)
+
+    return pd.DataFrame(
+        {
+            "game_id": game_ids,
+            "home_spread": spread,
+            "home_spread_result": result(margin + spread, "W", "L"),
+            "over_under": over_under,
+            "over_under_result": result(total - over_under, "O", "U"),
+        }
+    )
+
+
+def result(difference, positive, negative):
+    return np.select([difference > 0, difference < 0], [positive, negative], "P")
+
+
+def team_frame(team_ids):
+    return pd.DataFrame(
+        {
+            "id": team_ids,
+            "name": [f"Team {i:02d}ers" for i in team_ids - FIRST_TEAM_ID],
+            "abbreviation": abbreviation(team_ids - FIRST_TEAM_ID),
+        }
+    )
+
+
+def player_frame(player_ids):
+    player_ids = np.sort(player_ids)
+    return pd.DataFrame(
+        {
+            "id": player_ids,
+            "name": [f"Player {abbreviation([i])[0].title()}" for i in player_ids],
+        }
+    )
+
+
+def abbreviation(numbers):
+    letters = string.ascii_uppercase
+    return [
+        letters[n // 676 % 26] + letters[n // 26 % 26] + letters[n % 26]
+        for n in numbers
+    ]
+
+
+# the legacy schema read by databall.database.Database
+def legacy_tables(tables):
+    team_stats = tables["team_stats"].drop(columns="season")
+    team_stats.columns = team_stats.columns.str.upper()
+
+    games = tables["games"].merge(tables["covers"], left_on="id", right_on="game_id")
+    betting = games[["game_id", "home_spread", "home_spread_result"]].copy()
+    betting.columns = ["GAME_ID", "HOME_SPREAD", "HOME_SPREAD_WL"]
+
+    games = games[
+        ["season", "id", "home_team_id", "away_team_id", "game_date", "matchup"]
+        + ["home_wl"]
+    ].copy()
+    games.columns = games.columns.str.upper()
+    games["GAME_DATE"] = games.GAME_DATE.astype(str)
+
+    return {"team_game_stats": team_stats, "games": games, "betting": betting}
+
+
+def write_legacy(tables, path):
+    with closing(sqlite3.connect(path)) as connection:
+        for name, data in legacy_tables(tables).items():
+            data.to_sql(name, connection, if_exists="replace", index=False)
+
+        connection.commit()
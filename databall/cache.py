@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from databall import telemetry
+
+DEFAULT_MAX_BYTES = 2**30  # 1 GiB
+
+
+class FeatureCache:
+    suffix = ".parquet"
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(**params):
+        params = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(params.encode()).hexdigest()
+
+    def path(self, key):
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key):
+        path = self.path(key)
+
+        try:
+            # update the modification time so eviction drops least recently used
+            os.utime(path)
+            return pd.read_parquet(path)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, df):
+        path = self.path(key)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+        # write to a temporary file first so readers never see a partial file
+        df.to_parquet(temp)
+        os.replace(temp, path)
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        df = self.get(key)
+
+        if df is None:
+            telemetry.count("cache_misses")
+            df = compute()
+            self.put(key, df)
+        else:
+            telemetry.count("cache_hits")
+
+        return df
+
+    def evict(self):
+        files = [(path, _stat(path)) for path in self.directory.glob(f"*{self.suffix}")]
+        files = [(path, stat) for path, stat in files if stat is not None]
+        files.sort(key=lambda file: file[1].st_mtime)
+        size = sum(stat.st_size for _, stat in files)
+
+        for path, stat in files:
+            if size <= self.max_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+
+    def clear(self):
+        for path in self.directory.glob(f"*{self.suffix}"):
+            path.unlink(missing_ok=True)
+
+
+# files can be evicted by another process between listing and reading them
+def _stat(path):
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,209 @@
+import argparse
+import os
+
+# only argparse and os are imported up front so cron jobs and --help stay fast, each
+# command imports what it needs when it runs
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--database", help="database URL, default from db.settings")
+    common.add_argument(
+        "--workers", type=int, help="threads downloading ahead of the database writes"
+    )
+    common.add_argument(
+        "--rate-limit", type=float, help="average seconds to wait between requests"
+    )
+    common.add_argument(
+        "--timeout", type=float, help="seconds before a stats.nba.com request fails"
+    )
+    common.add_argument(
+        "--cache-dir", help="keep downloads of completed seasons in this directory"
+    )
+    common.add_argument(
+        "--dry-run", action="store_true", help="print what would run and exit"
+    )
+    common.add_argument(
+        "--profile", action="store_true", help="attach cProfile and memory to spans"
+    )
+    common.add_argument("--log", help="write span records to this JSON lines file")
+
+    seasons = argparse.ArgumentParser(add_help=False)
+    seasons.add_argument(
+        "--seasons",
+        type=int,
+        nargs=2,
+        metavar=("START", "STOP"),
+        help="first and last season, default every available season",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="databall", description="Build and maintain the DataBall database"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init = subparsers.add_parser(
+        "init", parents=[common], help="create the tables and load teams and players"
+    )
+    init.add_argument(
+        "--drop",
+        action=argparse.BooleanOptionalAction,
+        help="drop existing tables first, default from db.settings",
+    )
+    subparsers.add_parser(
+        "populate",
+        parents=[common, seasons],
+        help="download games and stats for a range of seasons",
+    )
+    subparsers.add_parser(
+        "update", parents=[common], help="download games and stats this season"
+    )
+    subparsers.add_parser(
+        "covers", parents=[common, seasons], help="scrape spreads from covers.com"
+    )
+
+    export = subparsers.add_parser(
+        "export", parents=[common, seasons], help="build a legacy SQLite database"
+    )
+    export.add_argument("output", help="SQLite file to write")
+    export.add_argument(
+        "--append", action="store_true", help="append to the tables instead"
+    )
+
+    bench = subparsers.add_parser(
+        "bench",
+        help="run the benchmark suite",
+        description="Arguments are passed to python -m databall.benchmarks",
+    )
+    bench.add_argument("args", nargs=argparse.REMAINDER)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == "bench":
+        from databall.benchmarks.__main__ import main as bench
+
+        bench(args.args)
+        return
+
+    if args.dry_run:
+        print(plan(args))
+        return
+
+    configure(args)
+    COMMANDS[args.command](args)
+
+
+# the database URL, cache directory and timeout are read when their modules are first
+# imported, so they are passed through the environment before any of those imports
+def configure(args):
+    if args.database is not None:
+        os.environ["DATABALL_DATABASE_URL"] = args.database
+
+    if args.cache_dir is not None:
+        os.environ["DATABALL_CACHE_DIR"] = args.cache_dir
+
+    if args.timeout is not None:
+        os.environ["DATABALL_API_TIMEOUT"] = str(args.timeout)
+
+    if args.rate_limit is not None:
+        import databall.covers.settings as scrapy_settings
+
+        scrapy_settings.DOWNLOAD_DELAY = args.rate_limit
+
+    if args.profile or args.log:
+        from databall import telemetry
+
+        telemetry.enable_profiling(args.profile)
+
+        if args.log:
+            telemetry.log_to(args.log)
+
+
+def season_range(args):
+    from databall.constants import CURRENT_SEASON, MIN_SEASON
+
+    if args.command == "update":
+        return CURRENT_SEASON, CURRENT_SEASON
+
+    return tuple(args.seasons or (MIN_SEASON, CURRENT_SEASON))
+
+
+def plan(args):
+    database = args.database or "the database in db.settings"
+
+    if args.command == "init":
+        drop = {
+            None: " (dropping them first if db.settings.DROP is set)",
+            True: " after dropping them",
+            False: "",
+        }
+        return (
+            f"Would create tables in {database}{drop[args.drop]}, "
+            "then load teams and players"
+        )
+
+    start, stop = season_range(args)
+
+    if args.command == "export":
+        mode = "append to" if args.append else "replace"
+        return f"Would {mode} legacy tables in {args.output} for {start}-{stop}"
+
+    if args.command == "covers":
+        return f"Would scrape covers for {start}-{stop} into {database}"
+
+    return (
+        f"Would populate {start}-{stop} into {database} with "
+        f"{args.workers or 'default'} workers"
+    )
+
+
+def run_init(args):
+    from databall.db import builder
+
+    builder.init(drop=args.drop)
+
+
+def run_populate(args):
+    from databall.db import builder
+
+    start, stop = season_range(args)
+    builder.populate(start, stop, workers=args.workers)
+
+
+def run_update(args):
+    from databall.db import builder
+
+    builder.update(workers=args.workers)
+
+
+def run_covers(args):
+    from databall.db import Covers
+
+    start, stop = season_range(args)
+    Covers.populate(start, stop_season=stop)
+
+
+def run_export(args):
+    from databall.database_builder import build_database
+
+    start, stop = season_range(args)
+    if_exists = "append" if args.append else "replace"
+    sleep = 1 if args.rate_limit is None else args.rate_limit
+    build_database(args.output, start, stop, if_exists=if_exists, sleep=sleep)
+
+
+COMMANDS = {
+    "init": run_init,
+    "populate": run_populate,
+    "update": run_update,
+    "covers": run_covers,
+    "export": run_export,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -32,8 +32,9 @@ class GameSpider(Spider):
 
         teams = [team.strip().replace(" ", "-").lower() for team in teams]
 
-        if isinstance(season, int):
-            season = f"{season}-{season+1}"
+        # a list of seasons is crawled without following the season links
+        seasons = season if isinstance(season, list | tuple) else [season]
+        seasons = [f"{s}-{s+1}" if isinstance(s, int) else s for s in seasons]
 
         if isinstance(stop_season, int):
             self.stop_season = f"{stop_season}-{stop_season+1}"
@@ -43,6 +44,7 @@ class GameSpider(Spider):
         self.start_urls = [
             f"https://www.covers.com/sport/basketball/nba/teams/main/{team}/{season}"
             for team in teams
+            for season in seasons
         ]
 
     def parse(self, response):
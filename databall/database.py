@@ -1,16 +1,24 @@
-import sqlite3
-from collections import namedtuple
-from itertools import product, starmap
+from functools import partial
 
-import numpy as np
 import pandas as pd
 
-from databall import stats, team_stats
+from databall import telemetry
+from databall.db.session import read_only_engine
+from databall.features import (
+    add_advanced_stats,
+    add_srs,
+    default_stat_names,
+    merge_betting_stats,
+    windowed_stats,
+)
 
 
 class Database:
-    def __init__(self, database):
-        self.__conn = sqlite3.connect(database)
+    def __init__(self, database, cache=None, **engine_kwargs):
+        self.database = database
+        self.cache = cache
+        self.engine_kwargs = engine_kwargs
+        self.engine = read_only_engine(database, **engine_kwargs)
 
         select = """
             SEASON,
@@ -96,87 +104,78 @@ class Database:
             WHERE home.GAME_ID = away.GAME_ID
         """
 
-    def betting_stats(self, stat_names=None, window=None):
-        data = self.game_stats()
-        data["PACE"] = team_stats.pace(data)
-        data["POSSESSIONS"] = team_stats.possessions(data)
-        data["TEAM_OFF_RTG"] = team_stats.off_rating(data)
-        data["TEAM_DEF_RTG"] = team_stats.def_rating(data)
-        data["TEAM_NET_RTG"] = data["TEAM_OFF_RTG"] - data["TEAM_DEF_RTG"]
-        data["TEAM_EFG"] = stats.eff_fg_pct(data, "TEAM_")
-        data["TEAM_TOV_PCT"] = stats.tov_pct(data, "TEAM_")
-        data["TEAM_OREB_PCT"] = team_stats.oreb_pct(data)
-        data["TEAM_DREB_PCT"] = team_stats.dreb_pct(data)
-        data["TEAM_FT_PER_FGA"] = stats.ft_per_fga(data, "TEAM_")
+    def __enter__(self):
+        return self
 
-        efg = data.TEAM_EFG
-        oreb = data.TEAM_OREB_PCT
-        dreb = data.TEAM_DREB_PCT
-        ftr = data.TEAM_FT_PER_FGA
-        tov = data.TEAM_TOV_PCT
+    def __exit__(self, *args):
+        self.close()
 
-        data["TEAM_FOUR_FACTORS"] = 0.4 * efg + 0.2 * oreb + 0.15 * ftr - 0.25 * tov
-        data["TEAM_FOUR_FACTORS_REB"] = (
-            0.4 * efg + 0.1 * oreb + 0.1 * dreb + 0.15 * ftr - 0.25 * tov
-        )
+    # engines cannot be pickled, so worker processes open their own pool
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["engine"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.engine = read_only_engine(self.database, **self.engine_kwargs)
+
+    def close(self):
+        self.engine.dispose()
+
+    def read_sql(self, query):
+        with self.engine.connect() as connection:
+            return pd.read_sql(query, connection)
+
+    def betting_stats(self, stat_names=None, window=None, weighted=False):
+        compute = partial(self._betting_stats, stat_names, window, weighted)
+
+        with telemetry.span("features", window=window, weighted=weighted) as span:
+            if self.cache is None:
+                data = compute()
+            else:
+                key = self.cache.key(
+                    stat_names=stat_names,
+                    window=window,
+                    weighted=weighted,
+                    tables=self.fingerprint(),
+                )
+                data = self.cache.get_or_compute(key, compute)
+
+            span.count("rows", len(data))
+
+        return data
+
+    def _betting_stats(self, stat_names, window, weighted):
+        data = add_advanced_stats(self.game_stats())
 
         if stat_names is None:
-            stat_types = [
-                "FGM",
-                "FGA",
-                "FG3M",
-                "FG3A",
-                "FTM",
-                "FTA",
-                "OREB",
-                "DREB",
-                "REB",
-                "AST",
-                "TOV",
-                "STL",
-                "BLK",
-            ]
-            stat_names = ["TEAM_" + s for s in stat_types]
-            stat_names += ["OPP_" + s for s in stat_types]
-            stat_names += [
-                "TEAM_OFF_RTG",
-                "TEAM_DEF_RTG",
-                "TEAM_NET_RTG",
-                "TEAM_EFG",
-                "TEAM_TOV_PCT",
-                "TEAM_OREB_PCT",
-                "TEAM_DREB_PCT",
-                "TEAM_FT_PER_FGA",
-                "TEAM_FOUR_FACTORS",
-                "TEAM_FOUR_FACTORS_REB",
-                "PACE",
-                "POSSESSIONS",
-            ]
+            stat_names = default_stat_names()
 
         data = data[["SEASON", "GAME_ID", "TEAM_ID"] + stat_names]
-        data = self.windowed_stats(data, stat_names, window=window)
+        data = self.windowed_stats(data, stat_names, window=window, weighted=weighted)
 
-        games = pd.read_sql(
-            "SELECT * FROM games JOIN betting ON games.ID is betting.GAME_ID",
-            self.__conn,
-        )
-        games = games.merge(
-            data,
-            left_on=["SEASON", "ID", "HOME_TEAM_ID"],
-            right_on=["SEASON", "GAME_ID", "TEAM_ID"],
-        )
-        games = games.merge(
-            data,
-            left_on=["SEASON", "ID", "AWAY_TEAM_ID"],
-            right_on=["SEASON", "GAME_ID", "TEAM_ID"],
-            suffixes=("", "_AWAY"),
+        games = self.read_sql(
+            "SELECT * FROM games JOIN betting ON games.ID is betting.GAME_ID"
         )
-        games = games[games.HOME_SPREAD_WL != "P"]
+        return merge_betting_stats(games, data)
 
-        return games
+    # row counts and max game IDs change whenever a source table is updated
+    def fingerprint(self):
+        query = """
+            SELECT
+                (SELECT COUNT(*) FROM team_game_stats),
+                (SELECT MAX(GAME_ID) FROM team_game_stats),
+                (SELECT COUNT(*) FROM games),
+                (SELECT MAX(ID) FROM games),
+                (SELECT COUNT(*) FROM betting),
+                (SELECT MAX(GAME_ID) FROM betting)
+        """
+        with self.engine.connect() as connection:
+            return tuple(connection.exec_driver_sql(query).one())
 
     def game_stats(self):
-        return pd.read_sql(self.__game_query, self.__conn)
+        return self.read_sql(self.__game_query)
 
     def season_stats(self):
         query = f"""
@@ -220,28 +219,7 @@ class Database:
             GROUP BY SEASON, TEAM_ID
         """
 
-        data = pd.read_sql(query, self.__conn)
-        data["PACE"] = team_stats.pace(data)
-        data["POSSESSIONS"] = team_stats.possessions(data)
-        data["TEAM_OFF_RTG"] = team_stats.off_rating(data)
-        data["TEAM_DEF_RTG"] = team_stats.def_rating(data)
-        data["TEAM_NET_RTG"] = data["TEAM_OFF_RTG"] - data["TEAM_DEF_RTG"]
-        data["TEAM_EFG"] = stats.eff_fg_pct(data, "TEAM_")
-        data["TEAM_TOV_PCT"] = stats.tov_pct(data, "TEAM_")
-        data["TEAM_OREB_PCT"] = team_stats.oreb_pct(data)
-        data["TEAM_DREB_PCT"] = team_stats.dreb_pct(data)
-        data["TEAM_FT_PER_FGA"] = stats.ft_per_fga(data, "TEAM_")
-
-        efg = data.TEAM_EFG
-        oreb = data.TEAM_OREB_PCT
-        dreb = data.TEAM_DREB_PCT
-        ftr = data.TEAM_FT_PER_FGA
-        tov = data.TEAM_TOV_PCT
-
-        data["TEAM_FOUR_FACTORS"] = 0.4 * efg + 0.2 * oreb + 0.15 * ftr - 0.25 * tov
-        data["TEAM_FOUR_FACTORS_REB"] = (
-            0.4 * efg + 0.1 * oreb + 0.1 * dreb + 0.15 * ftr - 0.25 * tov
-        )
+        data = add_advanced_stats(self.read_sql(query))
 
         query = f"""
             SELECT SEASON, TEAM_ID, OPP_ID, COUNT(OPP_ID) AS GAMES_PLAYED
@@ -250,62 +228,13 @@ class Database:
             GROUP BY SEASON, TEAM_ID, OPP_ID
         """
 
-        opponents = pd.read_sql(query, self.__conn)
-
-        for season in pd.unique(data.SEASON):
-            season_opponents = opponents[opponents.SEASON == season]
-            teams = pd.unique(season_opponents.TEAM_ID)
-            schedule = np.zeros([len(teams), len(teams)])
-
-            for team in teams:
-                opp = season_opponents[season_opponents.TEAM_ID == team]
-                index = np.array([x in opp.OPP_ID.values for x in teams])
-                schedule[team == teams, index] = opp.GAMES_PLAYED
-
-            schedule /= sum(season_opponents.GAMES_PLAYED) / len(teams)
-            point_diff = data[data.SEASON == season].TEAM_PLUS_MINUS.values
-            srs = point_diff
-
-            for _ in range(10):
-                srs = point_diff + schedule.dot(srs)
-
-            data.loc[data.SEASON == season, "TEAM_SRS"] = srs
-
-        return data
+        opponents = self.read_sql(query)
+        return add_srs(data, opponents)
 
     # data = DataFrame to average over
     # stat_names = list of stats that should be averaged and shifted
     # window = number of games to average, None indicates all games are used
-    # weighted = whether or not recent games are weighted more heavily
+    # weighted = whether or not recent games are weighted more heavily, through
+    #            exponential weights with a span of window games
     def windowed_stats(self, data, stat_names, window=None, weighted=False):
-        data = data.copy()
-        seasons = data.SEASON.unique()[1:]
-        teams = data.TEAM_ID.unique()
-        grouped = data.groupby(["SEASON", "TEAM_ID"])
-        keys = grouped.groups.keys()
-        team_season = namedtuple("team_season", ["season", "team"])
-
-        for group in starmap(
-            team_season, [x for x in product(seasons, teams) if x in keys]
-        ):
-            g = grouped.get_group(group)
-            sub = g[stat_names].expanding().mean()
-
-            if window is not None:
-                roll = g[stat_names].rolling(window=window).mean()
-                w = window - 1
-                sub = sub[:w].append(roll[w:])
-
-            # Shift stats down one game so only previous information is used
-            sub = sub.shift(1)
-
-            # Fill in first game with average of previous season
-            previous = (group.season - 1, group.team)
-
-            if previous in keys:
-                sub.iloc[0] = grouped.get_group(previous)[stat_names].mean()
-
-            # Store subset in full DataFrame
-            data.loc[sub.index, stat_names] = sub
-
-        return data
+        return windowed_stats(data, stat_names, window=window, weighted=weighted)
@@ -1,6 +1,6 @@
-import json
 import sqlite3
 import time
+from contextlib import closing, contextmanager
 
 import pandas as pd
 from nba_api.stats.endpoints.leaguedashplayerstats import LeagueDashPlayerStats
@@ -8,62 +8,70 @@ from nba_api.stats.endpoints.leaguedashteamstats import LeagueDashTeamStats
 from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
 from nba_api.stats.static import teams as TEAMS
 
+GAME_COLUMNS = [
+    "SEASON",
+    "ID",
+    "HOME_TEAM_ID",
+    "AWAY_TEAM_ID",
+    "GAME_DATE",
+    "MATCHUP",
+    "HOME_WL",
+]
+
+# the columns Database joins and filters on
+INDEXES = {
+    "games": ["ID"],
+    "team_game_stats": ["GAME_ID", "TEAM_ID"],
+    "player_game_stats": ["GAME_ID", "PLAYER_ID"],
+    "team_season_stats": ["SEASON", "TEAM_ID"],
+    "player_season_stats": ["SEASON", "PLAYER_ID"],
+}
+
 
 def add_player_game_stats(conn, start_season, end_season, if_exists="append", sleep=1):
     table_name = "player_game_stats"
-
-    if if_exists == "replace":
-        conn.execute("DROP TABLE IF EXISTS " + table_name)
-        conn.execute("DROP TABLE IF EXISTS players")
-
-    conn.execute(
-        f"""CREATE TABLE IF NOT EXISTS {table_name} (
-            PLAYER_ID INTEGER, TEAM_ID INTEGER, GAME_ID TEXT, MIN INTEGER, FGM INTEGER,
-            FGA INTEGER, FG3M INTEGER, FG3A INTEGER, FTM INTEGER, FTA INTEGER,
-            OREB INTEGER, DREB INTEGER, REB INTEGER, AST INTEGER, STL INTEGER,
-            BLK INTEGER, TOV INTEGER, PF INTEGER, PTS INTEGER, PLUS_MINUS INTEGER)"""
-    )
-
-    conn.execute("CREATE TABLE IF NOT EXISTS players (ID INTEGER, NAME TEXT)")
+    tables = []
 
     for season in range(start_season, end_season + 1):
         print("Reading " + season_str(season) + " player game stats")
         table = LeagueGameLog(
             season=season_str(season), player_or_team_abbreviation="P"
         ).get_data_frames()[0]
-        table.to_sql("temp", conn, if_exists="append", index=False)
-        labels = ["ABBREV", "DATE", "MATCHUP", "NAME", "PCT", "SEASON", "VIDEO", "WL"]
-        table.drop(labels_to_drop(table.columns, labels), axis=1, inplace=True)
-        table.dropna(
-            axis=0, how="any", subset=["GAME_ID", "PLAYER_ID", "TEAM_ID"], inplace=True
-        )
-        table.to_sql(table_name, conn, if_exists="append", index=False)
+        tables.append(table)
         time.sleep(sleep)
 
-    query = "SELECT DISTINCT PLAYER_ID AS ID, PLAYER_NAME AS NAME FROM temp ORDER BY ID"
-    pd.read_sql(query, conn).to_sql("players", conn, if_exists="append", index=False)
-    conn.execute("DROP TABLE temp")
-    conn.execute("VACUUM")
+    table = pd.concat(tables, ignore_index=True)
+    players = table[["PLAYER_ID", "PLAYER_NAME"]].drop_duplicates()
+    players = players.sort_values("PLAYER_ID")
+    players.columns = ["ID", "NAME"]
+
+    labels = ["ABBREV", "DATE", "MATCHUP", "NAME", "PCT", "SEASON", "VIDEO", "WL"]
+    table = table.drop(labels_to_drop(table.columns, labels), axis=1)
+    table = table.dropna(axis=0, how="any", subset=["GAME_ID", "PLAYER_ID", "TEAM_ID"])
+
+    with transaction(conn):
+        if if_exists == "replace":
+            conn.execute("DROP TABLE IF EXISTS " + table_name)
+            conn.execute("DROP TABLE IF EXISTS players")
+
+        conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table_name} (
+            PLAYER_ID INTEGER, TEAM_ID INTEGER, GAME_ID TEXT, MIN INTEGER, FGM INTEGER,
+            FGA INTEGER, FG3M INTEGER, FG3A INTEGER, FTM INTEGER, FTA INTEGER,
+            OREB INTEGER, DREB INTEGER, REB INTEGER, AST INTEGER, STL INTEGER,
+            BLK INTEGER, TOV INTEGER, PF INTEGER, PTS INTEGER, PLUS_MINUS INTEGER)"""
+        )
+
+        conn.execute("CREATE TABLE IF NOT EXISTS players (ID INTEGER, NAME TEXT)")
+        insert_df(conn, table_name, table)
+        insert_df(conn, "players", players)
 
 
 def add_player_season_stats(
     conn, start_season, end_season, if_exists="append", sleep=1
 ):
     table_name = "player_season_stats"
-
-    if if_exists == "replace":
-        conn.execute("DROP TABLE IF EXISTS " + table_name)
-        conn.execute("VACUUM")
-
-    conn.execute(
-        f"""CREATE TABLE IF NOT EXISTS {table_name} (
-            SEASON INTEGER, PLAYER_ID INTEGER, TEAM_ID INTEGER, AGE REAL, GP INTEGER,
-            W INTEGER, L INTEGER, W_PCT REAL, MIN REAL, FGM REAL, FGA REAL, FG_PCT REAL,
-            FG3M REAL, FG3A REAL, FG3_PCT REAL, FTM REAL, FTA REAL, FT_PCT REAL,
-            OREB REAL, DREB REAL, REB REAL, AST REAL, TOV REAL, STL REAL, BLK REAL,
-            BLKA REAL, PF REAL, PFD REAL, PTS REAL, PLUS_MINUS REAL,
-            DD2 INTEGER, TD3 INTEGER)"""
-    )
+    tables = []
 
     for season in range(start_season, end_season + 1):
         print("Reading " + season_str(season) + " player season stats")
@@ -72,119 +80,118 @@ def add_player_season_stats(
         table.drop(labels_to_drop(table.columns, labels), axis=1, inplace=True)
         table.dropna(axis=0, how="any", subset=["PLAYER_ID", "TEAM_ID"], inplace=True)
         table["SEASON"] = season
-        table.to_sql(table_name, conn, if_exists="append", index=False)
+        tables.append(table)
         time.sleep(sleep)
 
+    with transaction(conn):
+        if if_exists == "replace":
+            conn.execute("DROP TABLE IF EXISTS " + table_name)
+
+        conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table_name} (
+            SEASON INTEGER, PLAYER_ID INTEGER, TEAM_ID INTEGER, AGE REAL, GP INTEGER,
+            W INTEGER, L INTEGER, W_PCT REAL, MIN REAL, FGM REAL, FGA REAL, FG_PCT REAL,
+            FG3M REAL, FG3A REAL, FG3_PCT REAL, FTM REAL, FTA REAL, FT_PCT REAL,
+            OREB REAL, DREB REAL, REB REAL, AST REAL, TOV REAL, STL REAL, BLK REAL,
+            BLKA REAL, PF REAL, PFD REAL, PTS REAL, PLUS_MINUS REAL,
+            DD2 INTEGER, TD3 INTEGER)"""
+        )
+
+        insert_df(conn, table_name, pd.concat(tables, ignore_index=True))
+
 
 def add_teams(conn):
     print("Reading team information")
-    conn.execute("DROP TABLE IF EXISTS teams")
-    conn.execute("VACUUM")
-    conn.execute(
-        """
-        CREATE TABLE teams (
-            ID INTEGER, ABBREVIATION TEXT, MASCOT TEXT,
-            NAME TEXT, CITY TEXT, STATE TEXT, YEAR INTEGER
-        )
-        """
-    )
-    teams = TEAMS.get_teams()
-    teams = json.dumps(teams)
-    teams = pd.read_json(teams)
+    teams = pd.DataFrame(TEAMS.get_teams())
     teams.rename(
         columns={"full_name": "NAME", "nickname": "MASCOT", "year_founded": "YEAR"},
         inplace=True,
     )
-    teams.to_sql("teams", conn, if_exists="append", index=False)
+    teams.columns = teams.columns.str.upper()
+
+    with transaction(conn):
+        conn.execute("DROP TABLE IF EXISTS teams")
+        conn.execute(
+            """
+            CREATE TABLE teams (
+                ID INTEGER, ABBREVIATION TEXT, MASCOT TEXT,
+                NAME TEXT, CITY TEXT, STATE TEXT, YEAR INTEGER
+            )
+            """
+        )
+        insert_df(conn, "teams", teams)
 
 
 def add_team_game_stats(conn, start_season, end_season, if_exists="append", sleep=1):
     table_name = "team_game_stats"
-
-    if if_exists == "replace":
-        conn.execute("DROP TABLE IF EXISTS " + table_name)
-        conn.execute("DROP TABLE IF EXISTS games")
-
-    conn.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            TEAM_ID INTEGER, GAME_ID TEXT, MIN INTEGER, FGM INTEGER, FGA INTEGER,
-            FG3M INTEGER, FG3A INTEGER, FTM INTEGER, FTA INTEGER, OREB INTEGER,
-            DREB INTEGER, REB INTEGER, AST INTEGER, STL INTEGER, BLK INTEGER,
-            TOV INTEGER, PF INTEGER, PTS INTEGER, PLUS_MINUS INTEGER
-        )
-        """
-    )
-
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS games (
-            SEASON INTEGER, ID TEXT, HOME_TEAM_ID INTEGER, AWAY_TEAM_ID INTEGER,
-            GAME_DATE TEXT, MATCHUP TEXT, HOME_WL TEXT
-        )
-        """
-    )
+    tables = []
+    games = []
 
     for season in range(start_season, end_season + 1):
         print("Reading " + season_str(season) + " team game stats")
         table = LeagueGameLog(
             season=season_str(season), player_or_team_abbreviation="T"
         ).get_data_frames()[0]
-        table["SEASON"] = season
-        table.to_sql("temp", conn, if_exists="append", index=False)
+        games.append(pair_games(table, season))
         labels = ["ABBREV", "DATE", "MATCHUP", "NAME", "PCT", "SEASON", "VIDEO", "WL"]
         table.drop(labels_to_drop(table.columns, labels), axis=1, inplace=True)
         table.dropna(axis=0, how="any", subset=["GAME_ID", "TEAM_ID"], inplace=True)
-        table.to_sql(table_name, conn, if_exists="append", index=False)
+        tables.append(table)
         time.sleep(sleep)
 
-    query = """
-    SELECT
-        SEASON,
-        ID,
-        HOME_TEAM_ID,
-        AWAY_TEAM_ID,
-        GAME_DATE,
-        MATCHUP,
-        HOME_WL
-    FROM
-        (SELECT TEAM_ID AS HOME_TEAM_ID,
-                GAME_ID AS ID,
-                SEASON,
-                GAME_DATE,
-                MATCHUP,
-                WL AS HOME_WL
-            FROM temp
-            WHERE MATCHUP LIKE '%vs%') AS home,
-        (SELECT TEAM_ID AS AWAY_TEAM_ID,
-                GAME_ID
-            FROM temp
-            WHERE MATCHUP LIKE '%@%') AS away
-    WHERE home.ID = away.GAME_ID
-    """
-    pd.read_sql(query, conn).to_sql("games", conn, if_exists="append", index=False)
-    conn.execute("DROP TABLE temp")
-    conn.execute("VACUUM")
+    with transaction(conn):
+        if if_exists == "replace":
+            conn.execute("DROP TABLE IF EXISTS " + table_name)
+            conn.execute("DROP TABLE IF EXISTS games")
+
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                TEAM_ID INTEGER, GAME_ID TEXT, MIN INTEGER, FGM INTEGER, FGA INTEGER,
+                FG3M INTEGER, FG3A INTEGER, FTM INTEGER, FTA INTEGER, OREB INTEGER,
+                DREB INTEGER, REB INTEGER, AST INTEGER, STL INTEGER, BLK INTEGER,
+                TOV INTEGER, PF INTEGER, PTS INTEGER, PLUS_MINUS INTEGER
+            )
+            """
+        )
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS games (
+                SEASON INTEGER, ID TEXT, HOME_TEAM_ID INTEGER, AWAY_TEAM_ID INTEGER,
+                GAME_DATE TEXT, MATCHUP TEXT, HOME_WL TEXT
+            )
+            """
+        )
+
+        insert_df(conn, table_name, pd.concat(tables, ignore_index=True))
+        insert_df(conn, "games", pd.concat(games, ignore_index=True))
+
+
+# one row per game from the home team's row, which has "vs." in the matchup while the
+# away team's has "@"
+def pair_games(table, season):
+    away_index = table.MATCHUP.str.contains("@", regex=False)
+    home = table.loc[~away_index, ["GAME_ID", "TEAM_ID", "GAME_DATE", "MATCHUP", "WL"]]
+    away = table.loc[away_index, ["GAME_ID", "TEAM_ID"]]
+
+    games = home.merge(away, on="GAME_ID", suffixes=("", "_AWAY"))
+    games.insert(0, "SEASON", season)
+    games.rename(
+        columns={
+            "GAME_ID": "ID",
+            "TEAM_ID": "HOME_TEAM_ID",
+            "TEAM_ID_AWAY": "AWAY_TEAM_ID",
+            "WL": "HOME_WL",
+        },
+        inplace=True,
+    )
+    return games[GAME_COLUMNS]
 
 
 def add_team_season_stats(conn, start_season, end_season, if_exists="append", sleep=1):
     table_name = "team_season_stats"
-
-    if if_exists == "replace":
-        conn.execute("DROP TABLE IF EXISTS " + table_name)
-        conn.execute("VACUUM")
-
-    conn.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            SEASON INTEGER, TEAM_ID INTEGER, GP INTEGER, W INTEGER, L INTEGER,
-            W_PCT REAL, MIN REAL, FGM REAL, FGA REAL, FG_PCT REAL, FG3M REAL,
-            FG3A REAL, FG3_PCT REAL, FTM REAL, FTA REAL, FT_PCT REAL, OREB REAL,
-            DREB REAL, REB REAL, AST REAL, TOV REAL, STL REAL, BLK REAL, BLKA REAL,
-            PF REAL, PFD REAL, PTS REAL, PLUS_MINUS REAL
-        )
-        """
-    )
+    tables = []
 
     for season in range(start_season, end_season + 1):
         print("Reading " + season_str(season) + " team season stats")
@@ -193,21 +200,80 @@ def add_team_season_stats(conn, start_season, end_season, if_exists="append", sl
         table.drop(labels_to_drop(table.columns, labels), axis=1, inplace=True)
         table.dropna(axis=0, how="any", subset=["TEAM_ID"], inplace=True)
         table["SEASON"] = season
-        table.to_sql(table_name, conn, if_exists="append", index=False)
+        tables.append(table)
         time.sleep(sleep)
 
+    with transaction(conn):
+        if if_exists == "replace":
+            conn.execute("DROP TABLE IF EXISTS " + table_name)
+
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                SEASON INTEGER, TEAM_ID INTEGER, GP INTEGER, W INTEGER, L INTEGER,
+                W_PCT REAL, MIN REAL, FGM REAL, FGA REAL, FG_PCT REAL, FG3M REAL,
+                FG3A REAL, FG3_PCT REAL, FTM REAL, FTA REAL, FT_PCT REAL, OREB REAL,
+                DREB REAL, REB REAL, AST REAL, TOV REAL, STL REAL, BLK REAL, BLKA REAL,
+                PF REAL, PFD REAL, PTS REAL, PLUS_MINUS REAL
+            )
+            """
+        )
 
-def build_database(database, start_season, end_season, if_exists="replace", sleep=1):
-    conn = sqlite3.connect(database)
+        insert_df(conn, table_name, pd.concat(tables, ignore_index=True))
 
-    if if_exists == "replace":
-        add_teams(conn)
 
-    add_player_game_stats(conn, start_season, end_season, if_exists, sleep)
-    add_player_season_stats(conn, start_season, end_season, if_exists, sleep)
-    add_team_game_stats(conn, start_season, end_season, if_exists, sleep)
-    add_team_season_stats(conn, start_season, end_season, if_exists, sleep)
-    conn.close()
+# every table is downloaded in full and then written in one transaction, while VACUUM
+# and the indexes wait until all of them are loaded
+def build_database(database, start_season, end_season, if_exists="replace", sleep=1):
+    with closing(sqlite3.connect(database)) as conn:
+        if if_exists == "replace":
+            add_teams(conn)
+
+        add_player_game_stats(conn, start_season, end_season, if_exists, sleep)
+        add_player_season_stats(conn, start_season, end_season, if_exists, sleep)
+        add_team_game_stats(conn, start_season, end_season, if_exists, sleep)
+        add_team_season_stats(conn, start_season, end_season, if_exists, sleep)
+
+        if if_exists == "replace":
+            conn.execute("VACUUM")
+
+        create_indexes(conn)
+
+
+def create_indexes(conn):
+    with transaction(conn):
+        for table_name, columns in INDEXES.items():
+            name = "_".join([table_name, *columns]).lower()
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} "
+                f"({', '.join(columns)})"
+            )
+
+
+# sqlite3 only opens a transaction implicitly before INSERT, UPDATE and DELETE, so DROP
+# and CREATE would commit on their own and a failed load would lose the old table
+@contextmanager
+def transaction(conn):
+    conn.execute("BEGIN")
+
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.commit()
+
+
+# sqlite3 cannot bind numpy scalars, so values are converted to Python objects first
+def insert_df(conn, table_name, df):
+    df = df.astype(object).where(df.notna(), None)
+    columns = ", ".join(df.columns)
+    values = ", ".join("?" * len(df.columns))
+    conn.executemany(
+        f"INSERT INTO {table_name} ({columns}) VALUES ({values})",
+        df.itertuples(index=False, name=None),
+    )
 
 
 def labels_to_drop(column_names, list_of_strings):
@@ -1,5 +1,26 @@
-from .tables.covers import Covers  # noqa: F401
-from .tables.game import Games  # noqa: F401
-from .tables.player import Players  # noqa: F401
-from .tables.stats import PlayerStats, TeamStats  # noqa: F401
-from .tables.team import Teams  # noqa: F401
+from importlib import import_module
+
+# tables are imported on first access, so modules such as databall.db.session do not
+# pay for every table and the scrapy and nba_api code behind them
+_tables = {
+    "Covers": ".tables.covers",
+    "Games": ".tables.game",
+    "Journal": ".tables.journal",
+    "Players": ".tables.player",
+    "PlayerStats": ".tables.stats",
+    "TeamStats": ".tables.stats",
+    "Teams": ".tables.team",
+}
+
+__all__ = list(_tables)
+
+
+def __getattr__(name):
+    if name not in _tables:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(import_module(_tables[name], __name__), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
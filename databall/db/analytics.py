@@ -0,0 +1,256 @@
+from functools import partial
+
+import pandas as pd
+from sqlalchemy import Float, String, cast, func, select
+from sqlalchemy.orm import aliased
+
+from databall import telemetry
+from databall.db.session import engine as default_engine
+from databall.db.tables.covers import Covers
+from databall.db.tables.game import Games
+from databall.db.tables.stats import TeamStats
+from databall.features import (
+    add_advanced_stats,
+    add_srs,
+    default_stat_names,
+    merge_betting_stats,
+    windowed_stats,
+)
+
+STAT_COLUMNS = [
+    "min",
+    "fgm",
+    "fga",
+    "fg3m",
+    "fg3a",
+    "ftm",
+    "fta",
+    "oreb",
+    "dreb",
+    "reb",
+    "ast",
+    "tov",
+    "stl",
+    "blk",
+    "pts",
+    "plus_minus",
+]
+
+
+class Analytics:
+    def __init__(self, engine=None, cache=None):
+        self.engine = engine or default_engine
+        self.cache = cache
+
+    def read_sql(self, query):
+        with self.engine.connect() as connection:
+            return pd.read_sql(query, connection)
+
+    def betting_stats(
+        self,
+        stat_names=None,
+        window=None,
+        weighted=False,
+        start_season=None,
+        stop_season=None,
+        season_type=None,
+        teams=None,
+    ):
+        compute = partial(
+            self._betting_stats,
+            stat_names,
+            window,
+            weighted,
+            start_season,
+            stop_season,
+            season_type,
+            teams,
+        )
+
+        with telemetry.span("features", window=window, weighted=weighted) as span:
+            if self.cache is None:
+                data = compute()
+            else:
+                key = self.cache.key(
+                    stat_names=stat_names,
+                    window=window,
+                    weighted=weighted,
+                    start_season=start_season,
+                    stop_season=stop_season,
+                    season_type=season_type,
+                    teams=sorted(teams) if teams is not None else None,
+                    tables=self.fingerprint(),
+                )
+                data = self.cache.get_or_compute(key, compute)
+
+            span.count("rows", len(data))
+
+        return data
+
+    def _betting_stats(
+        self,
+        stat_names,
+        window,
+        weighted,
+        start_season,
+        stop_season,
+        season_type,
+        teams,
+    ):
+        games = self.read_sql(
+            self.games_query(start_season, stop_season, season_type, teams)
+        )
+
+        if stat_names is None:
+            stat_names = default_stat_names()
+
+        # windowed stats fill the first game of a season with the previous season,
+        # and averages need every game played by either team in the selected games
+        data = self.game_stats(
+            start_season=None if start_season is None else start_season - 1,
+            stop_season=stop_season,
+            season_type=season_type,
+            teams=pd.unique(games[["HOME_TEAM_ID", "AWAY_TEAM_ID"]].values.ravel()),
+        )
+        data = add_advanced_stats(data)
+        data = data[["SEASON", "GAME_ID", "TEAM_ID"] + stat_names]
+        data = windowed_stats(data, stat_names, window=window, weighted=weighted)
+        return merge_betting_stats(games, data)
+
+    # row counts and max game IDs change whenever a source table is updated
+    def fingerprint(self):
+        tables = [
+            (TeamStats, TeamStats.game_id),
+            (Games, Games.id),
+            (Covers, Covers.game_id),
+        ]
+        query = select(
+            *[
+                select(aggregate).select_from(table).scalar_subquery()
+                for table, game_id in tables
+                for aggregate in [func.count(), func.max(game_id)]
+            ]
+        )
+
+        with self.engine.connect() as connection:
+            return tuple(connection.execute(query).one())
+
+    def game_stats(
+        self, start_season=None, stop_season=None, season_type=None, teams=None
+    ):
+        return self.read_sql(
+            self.game_stats_query(start_season, stop_season, season_type, teams)
+        )
+
+    def game_stats_query(
+        self, start_season=None, stop_season=None, season_type=None, teams=None
+    ):
+        team = aliased(TeamStats)
+        opp = aliased(TeamStats)
+
+        query = (
+            select(
+                Games.season.label("SEASON"),
+                team.game_id.label("GAME_ID"),
+                team.team_id.label("TEAM_ID"),
+                *[getattr(team, c).label(f"TEAM_{c.upper()}") for c in STAT_COLUMNS],
+                opp.team_id.label("OPP_ID"),
+                *[getattr(opp, c).label(f"OPP_{c.upper()}") for c in STAT_COLUMNS],
+                cast(Games.home_wl, String).label("HOME_WL"),
+            )
+            .join_from(
+                team,
+                opp,
+                (team.season == opp.season)
+                & (team.game_id == opp.game_id)
+                & (team.team_id != opp.team_id),
+            )
+            .join(Games, Games.id == team.game_id)
+            .order_by(Games.game_date, team.game_id, team.team_id)
+        )
+
+        query = filter_games(query, start_season, stop_season, season_type)
+
+        # filtering both sides of the join on their own season lets Postgres skip
+        # partitions, since range filters are not carried across the join condition
+        if start_season is not None:
+            query = query.where(team.season >= start_season, opp.season >= start_season)
+
+        if stop_season is not None:
+            query = query.where(team.season <= stop_season, opp.season <= stop_season)
+
+        if teams is not None:
+            query = query.where(team.team_id.in_([int(t) for t in teams]))
+
+        return query
+
+    def games_query(
+        self, start_season=None, stop_season=None, season_type=None, teams=None
+    ):
+        query = select(
+            Games.id.label("ID"),
+            Games.home_team_id.label("HOME_TEAM_ID"),
+            Games.away_team_id.label("AWAY_TEAM_ID"),
+            Games.season.label("SEASON"),
+            cast(Games.season_type, String).label("SEASON_TYPE"),
+            Games.game_date.label("GAME_DATE"),
+            Games.matchup.label("MATCHUP"),
+            cast(Games.home_wl, String).label("HOME_WL"),
+            cast(Covers.home_spread, Float).label("HOME_SPREAD"),
+            cast(Covers.home_spread_result, String).label("HOME_SPREAD_WL"),
+            cast(Covers.over_under, Float).label("OVER_UNDER"),
+            cast(Covers.over_under_result, String).label("OVER_UNDER_RESULT"),
+        ).join(Covers, Covers.game_id == Games.id)
+
+        query = filter_games(query, start_season, stop_season, season_type)
+
+        if teams is not None:
+            teams = [int(t) for t in teams]
+            query = query.where(
+                Games.home_team_id.in_(teams) | Games.away_team_id.in_(teams)
+            )
+
+        return query.order_by(Games.game_date, Games.id)
+
+    def season_stats(
+        self, start_season=None, stop_season=None, season_type=None, teams=None
+    ):
+        games = self.game_stats_query(
+            start_season, stop_season, season_type, teams
+        ).subquery()
+        averages = [
+            func.avg(games.c[f"{group}_{c.upper()}"]).label(f"{group}_{c.upper()}")
+            for group in ["TEAM", "OPP"]
+            for c in STAT_COLUMNS
+        ]
+
+        query = (
+            select(games.c.SEASON, games.c.TEAM_ID, *averages)
+            .group_by(games.c.SEASON, games.c.TEAM_ID)
+            .order_by(games.c.SEASON, games.c.TEAM_ID)
+        )
+        data = add_advanced_stats(self.read_sql(query))
+
+        query = select(
+            games.c.SEASON,
+            games.c.TEAM_ID,
+            games.c.OPP_ID,
+            func.count(games.c.OPP_ID).label("GAMES_PLAYED"),
+        ).group_by(games.c.SEASON, games.c.TEAM_ID, games.c.OPP_ID)
+        query = query.order_by(games.c.SEASON, games.c.TEAM_ID, games.c.OPP_ID)
+
+        opponents = self.read_sql(query)
+        return add_srs(data, opponents)
+
+
+def filter_games(query, start_season=None, stop_season=None, season_type=None):
+    if start_season is not None:
+        query = query.where(Games.season >= start_season)
+
+    if stop_season is not None:
+        query = query.where(Games.season <= stop_season)
+
+    if season_type is not None:
+        query = query.where(Games.season_type == season_type)
+
+    return query
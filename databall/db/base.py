@@ -1,11 +1,14 @@
 import re
+from importlib import import_module
 
 import pandas as pd
-from pydantic import BaseModel
+from pydantic import TypeAdapter
 from sqlalchemy import inspect, select
 from sqlalchemy.orm import declared_attr
 from sqlmodel import SQLModel
 
+from databall import telemetry
+from databall.db import postgres
 from databall.db.session import Session, engine
 
 
@@ -25,30 +28,84 @@ class Base(SQLModel):
     def primary_keys(cls):
         with Session() as session, session.connection() as connection:
             columns = inspect(cls).primary_key
-            query = select(columns)
+            query = select(*columns)
             df = pd.read_sql(query, connection)
 
         return df
 
     @classmethod
     def save_df(cls, df):
-        df_save = df.merge(cls.primary_keys, how="left", indicator=True)
-        df_save = df_save[df_save._merge == "left_only"]
+        with telemetry.span("save", table=cls.__tablename__) as span:
+            span.count("rows", len(df))
 
-        if df_save.empty:
-            print(f"All primary keys already in {cls.__tablename__}")
+            with telemetry.span("dedup", table=cls.__tablename__):
+                df_save = df.merge(cls.primary_keys, how="left", indicator=True)
+                df_save = df_save[df_save._merge == "left_only"]
+
+            if df_save.empty:
+                print(f"All primary keys already in {cls.__tablename__}")
+                return
+
+            columns_to_drop = set(df_save.columns) - set(cls.__table__.columns.keys())
+            df_save = df_save.drop(columns_to_drop, axis=1)
+
+            with telemetry.span("validate", table=cls.__tablename__):
+                cls.validate_df(df_save)
+
+            # Postgres loads through COPY and SQLite through batched inserts
+            method = postgres.copy_insert if postgres.is_postgres(engine) else None
+
+            with telemetry.span("insert", table=cls.__tablename__) as insert:
+                df_save.to_sql(
+                    cls.__tablename__,
+                    engine,
+                    if_exists="append",
+                    index=False,
+                    method=method,
+                )
+                insert.count("rows", len(df_save))
+                insert.count("bytes", int(df_save.memory_usage(deep=True).sum()))
+
+            span.count("inserted", len(df_save))
+            print(f"Saved {len(df_save)} rows to {cls.__tablename__}")
+
+    # insert new rows and update existing ones in place, which SQLite and Postgres
+    # both support through INSERT ... ON CONFLICT
+    @classmethod
+    def upsert_df(cls, df):
+        if df.empty:
+            telemetry.logger.info(f"No rows to upsert to {cls.__tablename__}")
             return
 
-        columns_to_drop = set(df_save.columns) - set(cls.__table__.columns.keys())
-        df_save = df_save.drop(columns_to_drop, axis=1)
-        cls.validate_df(df_save)
-        df_save.to_sql(cls.__tablename__, engine, if_exists="append", index=False)
-        print(f"Saved {len(df_save)} rows to {cls.__tablename__}")
+        with telemetry.span("upsert", table=cls.__tablename__) as span:
+            df = df[df.columns.intersection(cls.__table__.columns.keys())]
+
+            with telemetry.span("validate", table=cls.__tablename__):
+                cls.validate_df(df)
+
+            dialect = import_module(f"sqlalchemy.dialects.{engine.dialect.name}")
+            statement = dialect.insert(cls.__table__)
+            keys = [column.name for column in cls.__table__.primary_key]
+            updates = {
+                column: statement.excluded[column]
+                for column in df.columns
+                if column not in keys
+            }
+
+            if updates:
+                statement = statement.on_conflict_do_update(
+                    index_elements=keys, set_=updates
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=keys)
+
+            with engine.begin() as connection:
+                connection.execute(statement, df.to_dict(orient="records"))
+
+            span.count("rows", len(df))
+            telemetry.logger.info(f"Upserted {len(df)} rows to {cls.__tablename__}")
 
     @classmethod
     def validate_df(cls, df):
-        class DataFrameModel(BaseModel):
-            __root__: list[cls]
-
         df_dict = df.to_dict(orient="records")
-        DataFrameModel.parse_obj(df_dict)
+        TypeAdapter(list[cls]).validate_python(df_dict)
@@ -1,48 +1,178 @@
-import random
-import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
 
 import databall.covers.settings as scrapy_settings
 import databall.db.settings as db_settings
+from databall import api, telemetry
 from databall.constants import CURRENT_SEASON, MIN_SEASON
-from databall.db import Covers, Games, Players, PlayerStats, Teams, TeamStats
+from databall.db import (
+    Covers,
+    Games,
+    Journal,
+    Players,
+    PlayerStats,
+    Teams,
+    TeamStats,
+    postgres,
+)
 from databall.db.base import Base
-from databall.db.session import AutocommitSession
+from databall.db.session import AutocommitSession, engine
+from databall.db.tables.journal import frame_checksum
 from databall.types import SeasonType
 
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF = 5.0
 DEFAULT_DELAY = 1.0
 DEFAULT_DROP = False
+DEFAULT_WORKERS = 1
+
+# tables filled for every (season, season type) unit in order, with the download
+# each is built from, so games are saved before the stats that reference them
+TABLES = {
+    Games: api.get_team_stats,
+    TeamStats: api.get_team_stats,
+    PlayerStats: api.get_player_stats,
+}
+
+logger = logging.getLogger("databall.builder")
+
 
+def init(drop=None):
+    drop = getattr(db_settings, "DROP", DEFAULT_DROP) if drop is None else drop
 
-def init():
     with AutocommitSession() as session, session.connection() as connection:
-        if getattr(db_settings, "DROP", DEFAULT_DROP):
+        if drop:
             Base.metadata.drop_all(connection)
-            session.execute("VACUUM")
+            session.execute(text("VACUUM"))
 
         Base.metadata.create_all(connection)
 
     Teams.populate()
     Players.populate()
+    postgres.analyze(engine, [Teams, Players])
+
+
+def populate(
+    start_season=MIN_SEASON, stop_season=CURRENT_SEASON, workers=None, delay=None
+):
+    if delay is None:
+        delay = getattr(scrapy_settings, "DOWNLOAD_DELAY", DEFAULT_DELAY)
+
+    workers = workers or getattr(db_settings, "WORKERS", DEFAULT_WORKERS)
+
+    # migrate stats tables from before season was in the key before downloading
+    TeamStats.migrate_schema()
+    PlayerStats.migrate_schema()
+
+    journal = Journal.completed()
+    units = {
+        (season, season_type): pending_tables(journal, season, season_type)
+        for season in range(start_season, stop_season + 1)
+        for season_type in SeasonType
+    }
+    units = {unit: tables for unit, tables in units.items() if tables}
+    limiter = api.RateLimiter(delay)
+    failed = []
+
+    # workers download ahead while this thread writes, since the downloads are
+    # cached and SQLite only allows one writer anyway
+    with ThreadPoolExecutor(workers) as pool:
+        downloads = [
+            pool.submit(download, season, season_type, tables, limiter)
+            for (season, season_type), tables in units.items()
+        ]
+
+        for ((season, season_type), tables), future in zip(units.items(), downloads):
+            with telemetry.span(
+                "populate", season=season, season_type=season_type.name
+            ) as span:
+                try:
+                    future.result()
+
+                    for table in tables:
+                        retry(populate_table, table, season, season_type, journal)
+                except Exception:
+                    logger.exception(f"Failed to populate {season} {season_type.name}")
+                    span.attributes["error"] = "failed"
+                    failed.append(f"{season} {season_type.name}")
+
+    postgres.analyze(engine, [*TABLES, Players])
 
+    # a rerun only repeats the units that are missing from the journal
+    if failed:
+        raise RuntimeError(
+            f"Failed to populate {', '.join(failed)}, run again to resume"
+        )
 
-def populate(start_season=MIN_SEASON, stop_season=CURRENT_SEASON):
-    duration = getattr(scrapy_settings, "DOWNLOAD_DELAY", DEFAULT_DELAY)
+    # covers of every pending season are scraped in a single crawl, since the
+    # reactor behind it cannot be restarted, and are journaled under the regular
+    # season
+    seasons = [
+        season
+        for season in range(start_season, stop_season + 1)
+        if season >= CURRENT_SEASON
+        or (season, SeasonType.REGULAR, Covers.__tablename__) not in journal
+    ]
 
-    for season in range(start_season, stop_season + 1):
-        for season_type in SeasonType:
-            # no need to wait between games and team stats since the data is cached
-            Games.populate(season, season_type)
-            TeamStats.populate(season, season_type)
-            wait(duration)
-            PlayerStats.populate(season, season_type)
-            wait(duration)
+    if seasons:
+        Covers.populate(seasons)
+        postgres.analyze(engine, [Covers])
 
-    Covers.populate(start_season, stop_season=stop_season)
+    for season in seasons:
+        if season < CURRENT_SEASON:
+            Journal.record(season, SeasonType.REGULAR, Covers.__tablename__)
 
 
-def update():
-    populate(start_season=CURRENT_SEASON)
+# units of finished seasons are skipped once journaled, while the current season is
+# always downloaded again since games are still being added
+def pending_tables(journal, season, season_type):
+    if season >= CURRENT_SEASON:
+        return list(TABLES)
 
+    return [
+        table
+        for table in TABLES
+        if (season, season_type, table.__tablename__) not in journal
+    ]
 
-def wait(duration):
-    time.sleep(duration * (random.random() + 0.5))
+
+def populate_table(table, season, season_type, journal):
+    source = TABLES[table](season, season_type)
+    checksum = frame_checksum(source)
+    key = (season, season_type, table.__tablename__)
+
+    if journal.get(key) == checksum:
+        logger.info(f"{table.__tablename__} unchanged for {season} {season_type.name}")
+        return
+
+    table.populate(season, season_type)
+    Journal.record(season, season_type, table.__tablename__, checksum, len(source))
+    journal[key] = checksum
+
+
+# api.fetch already retries requests, so downloads are not wrapped in retry here
+def download(season, season_type, tables, limiter):
+    for source in dict.fromkeys(TABLES[table] for table in tables):
+        limiter.wait()
+        source(season, season_type)
+
+
+def retry(func, *args, **kwargs):
+    attempts = getattr(db_settings, "ATTEMPTS", DEFAULT_ATTEMPTS)
+    backoff = getattr(db_settings, "BACKOFF", DEFAULT_BACKOFF)
+
+    def retrying(error, attempt):
+        logger.warning(
+            f"Attempt {attempt} of {attempts} failed, retrying", exc_info=error
+        )
+
+    return api.retry(
+        lambda attempt: func(*args, **kwargs), attempts, backoff, on_retry=retrying
+    )
+
+
+def update(**kwargs):
+    Players.populate()
+    populate(start_season=CURRENT_SEASON, **kwargs)
@@ -1,4 +1,4 @@
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Enum
 from sqlmodel import Field
 
 
@@ -23,12 +23,12 @@ def ConstrainedField(name, **kwargs):
     return Field(sa_column_args=sa_column_args, **kwargs)
 
 
-def EnumField(create_constraint=True, use_values=False, **kwargs):
+def EnumField(enum, create_constraint=True, use_values=False, **kwargs):
     values_callable = None if not use_values else lambda enum: [e.value for e in enum]
-    sa_type_kwargs = kwargs.pop("sa_type_kwargs", {})
-    sa_type_kwargs["create_constraint"] = create_constraint
-    sa_type_kwargs["values_callable"] = values_callable
-    return Field(sa_type_kwargs=sa_type_kwargs, **kwargs)
+    sa_type = Enum(
+        enum, create_constraint=create_constraint, values_callable=values_callable
+    )
+    return Field(sa_type=sa_type, **kwargs)
 
 
 def PositiveField(name, **kwargs):
@@ -0,0 +1,72 @@
+import csv
+import io
+
+from sqlalchemy import DDL, event, text
+
+# stats tables are split into one partition per season, with a default partition for
+# rows whose season has no partition yet
+PARTITION_BY = "LIST (season)"
+
+
+def is_postgres(bind):
+    return bind.dialect.name == "postgresql"
+
+
+def partition_name(table, season):
+    return f"{table.name}_{season}"
+
+
+def partition_by_season(table):
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TABLE IF NOT EXISTS {table.name}_default "
+            f"PARTITION OF {table.name} DEFAULT"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
+def create_partition(bind, table, season):
+    if not is_postgres(bind):
+        return
+
+    with bind.begin() as connection:
+        connection.execute(partition_ddl(table, season))
+
+
+def partition_ddl(table, season):
+    return text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, int(season))} "
+        f"PARTITION OF {table.name} FOR VALUES IN ({int(season)})"
+    )
+
+
+# DataFrame.to_sql method that streams the rows through COPY, which Postgres loads
+# much faster than batched INSERT statements
+def copy_insert(table, conn, keys, data_iter):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data_iter)
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{key}"' for key in keys)
+    name = f"{table.schema}.{table.name}" if table.schema else table.name
+    query = f"COPY {name} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+    with conn.connection.cursor() as cursor:
+        # psycopg 3 streams through cursor.copy, while psycopg2 has copy_expert
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(query, buffer)
+        else:
+            with cursor.copy(query) as copy:
+                copy.write(buffer.getvalue())
+
+
+# refresh planner statistics after a load, which autovacuum may not get to for a while
+def analyze(bind, tables):
+    if not is_postgres(bind):
+        return
+
+    with bind.begin() as connection:
+        for table in tables:
+            connection.execute(text(f"ANALYZE {table.__tablename__}"))
@@ -1,11 +1,91 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, exc, make_url
 from sqlalchemy.orm import sessionmaker
 
 from databall.db import settings, urls
 
-url = getattr(settings, "DATABASE_URL", urls.sqlite_url())
-engine = create_engine(url, future=True)
+DEFAULT_CACHE_SIZE = -64000  # negative values are in KiB, so 64 MiB
+DEFAULT_MMAP_SIZE = 2**28  # 256 MiB
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_SIZE = 5
+
+# the environment takes precedence so scripts can point at a scratch database
+url = os.environ.get(
+    "DATABALL_DATABASE_URL", getattr(settings, "DATABASE_URL", urls.sqlite_url())
+)
+
+
+# SQLite has one writer per file, so pooling only matters for server databases where
+# several workers and users share the database
+def pool_options(url):
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "pool_size": int(
+            os.environ.get(
+                "DATABALL_POOL_SIZE", getattr(settings, "POOL_SIZE", DEFAULT_POOL_SIZE)
+            )
+        ),
+        "max_overflow": getattr(settings, "MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW),
+        "pool_pre_ping": True,
+    }
+
+
+engine = create_engine(url, future=True, **pool_options(url))
 Session = sessionmaker(engine, future=True)
 
 autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
 AutocommitSession = sessionmaker(autocommit_engine, future=True)
+
+
+def read_only_engine(
+    dbfile,
+    cache_size=DEFAULT_CACHE_SIZE,
+    mmap_size=DEFAULT_MMAP_SIZE,
+    pool_size=DEFAULT_POOL_SIZE,
+):
+    path = Path(dbfile).resolve()
+
+    if not path.is_file():
+        raise FileNotFoundError(f"Database {path} does not exist")
+
+    # WAL lets readers run alongside a writer, but the journal mode is stored in the
+    # database file so it can only be switched on through a writable connection
+    try:
+        with closing(sqlite3.connect(path)) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError:
+        pass
+
+    read_only = create_engine(
+        f"{urls.sqlite_url(f'file:{path.as_posix()}')}?mode=ro&uri=true",
+        future=True,
+        pool_size=pool_size,
+        pool_pre_ping=True,
+    )
+
+    @event.listens_for(read_only, "connect")
+    def connect(dbapi_connection, connection_record):
+        connection_record.info["pid"] = os.getpid()
+
+        with closing(dbapi_connection.cursor()) as cursor:
+            cursor.execute("PRAGMA query_only=ON")
+            cursor.execute(f"PRAGMA cache_size={int(cache_size)}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+
+    # connections inherited through fork belong to the parent process
+    @event.listens_for(read_only, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info["pid"] != os.getpid():
+            connection_record.dbapi_connection = None
+            connection_proxy.dbapi_connection = None
+            raise exc.DisconnectionError(
+                "Connection record belongs to a different process"
+            )
+
+    return read_only
@@ -1,9 +1,6 @@
 from decimal import Decimal
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-
-from databall.covers import GameSpider
+from databall import telemetry
 from databall.db.base import Base
 from databall.db.columns import ConstrainedField, EnumField
 from databall.db.tables.game import GameID
@@ -19,7 +16,7 @@ class Covers(Base, GameID, table=True):
         max_digits=3,
         decimal_places=1,
     )
-    home_spread_result: SpreadResult = EnumField(use_values=True)
+    home_spread_result: SpreadResult = EnumField(SpreadResult, use_values=True)
     over_under: Decimal = ConstrainedField(
         name="over_under",
         ge=100,
@@ -28,16 +25,27 @@ class Covers(Base, GameID, table=True):
         max_digits=4,
         decimal_places=1,
     )
-    over_under_result: OverUnderResult = EnumField(use_values=True)
+    over_under_result: OverUnderResult = EnumField(OverUnderResult, use_values=True)
 
     @classmethod
     def populate(cls, season, *args, **kwargs):
+        from scrapy.crawler import CrawlerProcess
+        from scrapy.utils.project import get_project_settings
+
+        from databall.covers import GameSpider
+
         print(f"Scraping {season} covers")
-        settings = get_project_settings()
-        process = CrawlerProcess(settings)
-        crawler = process.create_crawler(GameSpider)
-        process.crawl(crawler, *args, season=season, **kwargs)
-        process.start()
 
-        games = crawler.stats.get_value("games", 0)
+        with telemetry.span("scrape", table=cls.__tablename__, season=season) as span:
+            settings = get_project_settings()
+            process = CrawlerProcess(settings)
+            crawler = process.create_crawler(GameSpider)
+            process.crawl(crawler, *args, season=season, **kwargs)
+            process.start()
+
+            games = crawler.stats.get_value("games", 0)
+            span.count("rows", games)
+            span.count("items", crawler.stats.get_value("item_scraped_count", 0))
+            span.count("bytes", crawler.stats.get_value("downloader/response_bytes", 0))
+
         print(f"Saved {games} rows to {cls.__tablename__}")
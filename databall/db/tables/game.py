@@ -1,5 +1,8 @@
 from datetime import date
+from functools import lru_cache
 
+import numpy as np
+import pandas as pd
 from pydantic import validator
 from sqlmodel import Field, SQLModel
 
@@ -10,18 +13,19 @@ from databall.db.columns import EnumField
 from databall.db.tables.team import Teams
 from databall.types import GameResult, SeasonType
 
+DEFAULT_CACHE_SIZE = 4
 TEAM_ID = Teams.__annotations__["id"]
 
 
 class Games(Base, table=True):
     id: str = Field(regex=r"^\d{10}$", max_length=10, primary_key=True)
-    home_team_id: TEAM_ID = Field(foreign_key=Teams.id, nullable=False)
-    away_team_id: TEAM_ID = Field(foreign_key=Teams.id, nullable=False)
+    home_team_id: TEAM_ID = Field(foreign_key="teams.id", nullable=False)
+    away_team_id: TEAM_ID = Field(foreign_key="teams.id", nullable=False)
     season: int = Field(ge=MIN_SEASON, le=CURRENT_SEASON)
-    season_type: SeasonType = EnumField()
+    season_type: SeasonType = EnumField(SeasonType)
     game_date: date = Field(nullable=False)
     matchup: str = Field(regex=r"^[A-Z]{3} vs. [A-Z]{3}$", max_length=11)
-    home_wl: GameResult = EnumField(use_values=True)
+    home_wl: GameResult = EnumField(GameResult, use_values=True)
 
     @validator("season_type", pre=True)
     def check_season_type(cls, name):
@@ -34,24 +38,51 @@ class Games(Base, table=True):
 
     @classmethod
     def populate(cls, season, season_type, **kwargs):
-        team_stats = get_team_stats(season, season_type, **kwargs)
-        away_index = team_stats.matchup.str.contains("@")
+        team_stats = team_game_log(season, season_type, **kwargs)
 
-        home = team_stats[~away_index].copy()
-        home.rename(
-            columns={"game_id": "id", "team_id": "home_team_id", "wl": "home_wl"},
-            inplace=True,
-        )
+        # after sorting, every complete game is a home row followed by an away row
+        paired = team_stats[team_stats.game_id.duplicated(keep=False)]
+        home = paired.iloc[0::2]
+        away = paired.iloc[1::2]
 
-        away = team_stats[away_index].copy()
-        away.rename(columns={"game_id": "id", "team_id": "away_team_id"}, inplace=True)
+        if (
+            home.away.any()
+            or not away.away.all()
+            or (home.game_id.to_numpy() != away.game_id.to_numpy()).any()
+        ):
+            raise ValueError(
+                f"Expected one home and one away team per game in {season}"
+            )
 
-        games = home.merge(away[["id", "away_team_id"]], on="id")
-        games["season"] = games.season_id.apply(lambda season_id: int(season_id[1:]))
-        games["season_type"] = season_type.name
+        games = pd.DataFrame(
+            {
+                "id": home.game_id.to_numpy(),
+                "home_team_id": home.team_id.to_numpy(),
+                "away_team_id": away.team_id.to_numpy(),
+                "season": home.season_id.str[1:].astype(int).to_numpy(),
+                "season_type": season_type.name,
+                "game_date": home.game_date.to_numpy(),
+                "matchup": home.matchup.to_numpy(),
+                "home_wl": home.wl.to_numpy(),
+            }
+        )
 
         cls.save_df(games)
 
 
+# team game log sorted by game with the home team first, shared by Games and
+# TeamStats so a season is only split once
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def team_game_log(season, season_type, **kwargs):
+    team_stats = get_team_stats(season, season_type, **kwargs)
+    away = team_stats.matchup.str.contains("@", regex=False).to_numpy()
+
+    # game IDs are all digits, and sorting them as integers is much faster
+    order = np.lexsort((away, team_stats.game_id.astype(np.int64).to_numpy()))
+    return team_stats.take(order).assign(away=away[order]).reset_index(drop=True)
+
+
 class GameID(SQLModel):
-    game_id: Games.__annotations__["id"] = Field(foreign_key=Games.id, primary_key=True)
+    game_id: Games.__annotations__["id"] = Field(
+        foreign_key="games.id", primary_key=True
+    )
@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import select
+from sqlmodel import Field
+
+from databall.db.base import Base
+from databall.db.columns import EnumField
+from databall.db.session import Session, engine
+from databall.types import SeasonType
+
+
+# one row per (season, season type, table) unit that populate has finished, with a
+# checksum of the download it was built from when there is one
+class Journal(Base, table=True):
+    season: int = Field(primary_key=True)
+    season_type: SeasonType = EnumField(SeasonType, primary_key=True)
+    table_name: str = Field(max_length=50, primary_key=True)
+    checksum: Optional[str] = Field(default=None, max_length=64)
+    rows: Optional[int] = Field(default=None, ge=0)
+    completed_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+    @classmethod
+    def completed(cls):
+        # databases built before the journal existed do not have the table yet
+        cls.__table__.create(engine, checkfirst=True)
+
+        with Session() as session, session.connection() as connection:
+            query = select(cls.season, cls.season_type, cls.table_name, cls.checksum)
+            df = pd.read_sql(query, connection)
+
+        return {
+            (row.season, row.season_type, row.table_name): row.checksum
+            for row in df.itertuples()
+        }
+
+    @classmethod
+    def record(cls, season, season_type, table_name, checksum=None, rows=None):
+        entry = cls(
+            season=season,
+            season_type=season_type,
+            table_name=table_name,
+            checksum=checksum,
+            rows=rows,
+        )
+
+        with Session() as session:
+            session.merge(entry)
+            session.commit()
+
+
+def frame_checksum(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
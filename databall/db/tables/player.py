@@ -1,8 +1,10 @@
+from sqlalchemy import select
 from sqlmodel import Field, SQLModel
 
 from databall.api import get_players
 from databall.db.base import Base
 from databall.db.columns import ConstrainedField
+from databall.db.session import Session
 
 NAME_REGEX = r"^[A-Z][A-Za-z,\'\-\.]+( [A-Za-z,\'\-\.]+)*$"
 
@@ -11,16 +13,48 @@ class Players(Base, table=True):
     id: int = ConstrainedField(name="id", gt=0, primary_key=True)
     name: str = Field(regex=NAME_REGEX, max_length=50, nullable=False)
 
+    # the full history of players is only downloaded on the first load, after that
+    # only the current roster is synced so new players and name changes are picked up
     @classmethod
     def populate(cls, **kwargs):
+        with Session() as session:
+            empty = session.execute(select(cls.id).limit(1)).first() is None
+
+        kwargs.setdefault("is_only_current_season", 0 if empty else 1)
         players = get_players(**kwargs)
-        players.rename(
-            columns={"person_id": "id", "display_first_last": "name"}, inplace=True
-        )
-        cls.save_df(players)
+        columns = {"person_id": "id", "display_first_last": "name"}
+        missing = set(columns) - set(players.columns)
+
+        if missing:
+            raise RuntimeError(
+                f"Players download is missing columns {', '.join(sorted(missing))}"
+            )
+
+        # the API lists some players without a name, which would fail validation
+        players = players[list(columns)].rename(columns=columns).dropna()
+        cls.upsert_df(players)
+
+    # add players that appear in game logs but not in the table yet, using the names
+    # from the game logs, so their stats do not fail the foreign key
+    @classmethod
+    def add_missing(cls, stats):
+        ids = stats.player_id.unique().tolist()
+
+        with Session() as session:
+            query = select(cls.id).where(cls.id.in_(ids))
+            existing = set(session.execute(query).scalars())
+
+        missing = stats[~stats.player_id.isin(existing)]
+
+        if missing.empty:
+            return
+
+        players = missing.drop_duplicates("player_id")[["player_id", "player_name"]]
+        players.columns = ["id", "name"]
+        cls.upsert_df(players)
 
 
 class PlayerID(SQLModel):
     player_id: Players.__annotations__["id"] = Field(
-        foreign_key=Players.id, primary_key=True
+        foreign_key="players.id", primary_key=True
     )
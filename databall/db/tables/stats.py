@@ -1,14 +1,26 @@
+import logging
+
+from sqlalchemy import inspect, text
 from sqlmodel import Field
 
-from databall.api import get_player_stats, get_team_stats
+from databall.api import get_player_stats
+from databall.constants import CURRENT_SEASON, MIN_SEASON
+from databall.db import postgres
 from databall.db.base import Base
 from databall.db.columns import PositiveField
-from databall.db.tables.game import GameID
-from databall.db.tables.player import PlayerID
+from databall.db.session import engine
+from databall.db.tables.game import GameID, Games, team_game_log
+from databall.db.tables.player import PlayerID, Players
 from databall.db.tables.team import TeamID
 
+logger = logging.getLogger("databall.db")
+
 
 class Stats(Base):
+    # the partition key has to be part of the primary key in Postgres
+    __table_args__ = {"postgresql_partition_by": postgres.PARTITION_BY}
+
+    season: int = Field(ge=MIN_SEASON, le=CURRENT_SEASON, primary_key=True)
     min: int = PositiveField("min")
     fgm: int = PositiveField("fgm")
     fga: int = PositiveField("fga")
@@ -29,13 +41,71 @@ class Stats(Base):
 
     @classmethod
     def populate(cls, season, season_type, **kwargs):
-        stats = cls.get_stats(season, season_type, **kwargs)
+        cls.migrate_schema()
+        stats = cls.get_stats(season, season_type, **kwargs).assign(season=season)
+        postgres.create_partition(engine, cls.__table__, season)
         cls.save_df(stats)
 
+    # stats tables created before season was part of the key lack the column, and
+    # create_all leaves existing tables as they are, so they are rebuilt with the
+    # season of each game copied from the games table
+    @classmethod
+    def migrate_schema(cls):
+        inspector = inspect(engine)
+
+        if not inspector.has_table(cls.__tablename__):
+            return
+
+        columns = inspector.get_columns(cls.__tablename__)
+
+        if "season" in [column["name"] for column in columns]:
+            return
+
+        name = cls.__tablename__
+        stash = f"{name}_migration"
+        names = [
+            column.name for column in cls.__table__.columns if column.name != "season"
+        ]
+        selected = ", ".join(f'stats."{column}"' for column in names)
+        inserted = ", ".join(f'"{column}"' for column in [*names, "season"])
+        logger.info(f"Adding season to the primary key of {name}")
+
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    f"CREATE TABLE {stash} AS SELECT {selected}, games.season "
+                    f"FROM {name} AS stats JOIN {Games.__tablename__} AS games "
+                    "ON games.id = stats.game_id"
+                )
+            )
+            connection.execute(text(f"DROP TABLE {name}"))
+            cls.__table__.create(connection)
+
+            # rows cannot be moved out of the default partition later
+            if postgres.is_postgres(engine):
+                query = text(f"SELECT DISTINCT season FROM {stash}")
+
+                for season in connection.execute(query).scalars():
+                    connection.execute(postgres.partition_ddl(cls.__table__, season))
+
+            connection.execute(
+                text(f"INSERT INTO {name} ({inserted}) SELECT {inserted} FROM {stash}")
+            )
+            connection.execute(text(f"DROP TABLE {stash}"))
+
 
 class PlayerStats(Stats, GameID, TeamID, PlayerID, table=True):
     get_stats = get_player_stats
 
+    @classmethod
+    def populate(cls, season, season_type, **kwargs):
+        Players.add_missing(cls.get_stats(season, season_type, **kwargs))
+        super().populate(season, season_type, **kwargs)
+
 
 class TeamStats(Stats, GameID, TeamID, table=True):
-    get_stats = get_team_stats
+    get_stats = team_game_log
+
+
+postgres.partition_by_season(PlayerStats.__table__)
+postgres.partition_by_season(TeamStats.__table__)
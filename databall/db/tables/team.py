@@ -20,4 +20,6 @@ class Teams(Base, table=True):
 
 
 class TeamID(SQLModel):
-    team_id: Teams.__annotations__["id"] = Field(foreign_key=Teams.id, primary_key=True)
+    team_id: Teams.__annotations__["id"] = Field(
+        foreign_key="teams.id", primary_key=True
+    )
@@ -0,0 +1,114 @@
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import fftconvolve
+
+DEFAULT_BINS = 200
+DEFAULT_CACHE_SIZE = 128
+MIN_BANDWIDTH = 1e-3  # relative to the magnitude of the data
+TRUNCATE = 4  # kernel radius in standard deviations
+
+# z is indexed [y, x] to match matplotlib contour functions
+Density = namedtuple("Density", ["x", "y", "z", "bandwidth"])
+
+
+# bin the points on a grid and smooth with a Gaussian kernel, which costs
+# O(n + bins^2 log bins) instead of evaluating every point at every grid node
+def density_grid(x, y, bins=DEFAULT_BINS, bandwidth=None, extent=None):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+
+    # Scott's rule in two dimensions on the full covariance, like scipy's
+    # gaussian_kde, since home and away stats can be correlated
+    if bandwidth is None:
+        covariance = np.cov(x, y) * len(x) ** (-1 / 3)
+    else:
+        covariance = np.diag(np.broadcast_to(np.square(bandwidth), 2))
+
+    # constant or perfectly correlated data has a singular covariance, so fall back
+    # to independent axes with at least the minimum bandwidth
+    variances = np.nan_to_num(np.diag(covariance))
+    floor = np.square(MIN_BANDWIDTH * np.maximum(np.abs([x.mean(), y.mean()]), 1))
+
+    if (variances < floor).any() or np.linalg.det(
+        covariance
+    ) <= 1e-9 * variances.prod():
+        covariance = np.diag(np.maximum(variances, floor))
+
+    bandwidth = np.sqrt(np.diag(covariance))
+
+    if extent is None:
+        pad = TRUNCATE * bandwidth
+        extent = [
+            (x.min() - pad[0], x.max() + pad[0]),
+            (y.min() - pad[1], y.max() + pad[1]),
+        ]
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=extent)
+    widths = np.array([x_edges[1] - x_edges[0], y_edges[1] - y_edges[0]])
+
+    kernel = gaussian(covariance / np.outer(widths, widths))
+    z = fftconvolve(counts, kernel, mode="same").clip(0)
+    z /= len(x) * widths.prod()
+
+    return Density(
+        (x_edges[:-1] + x_edges[1:]) / 2,
+        (y_edges[:-1] + y_edges[1:]) / 2,
+        z.T,
+        tuple(bandwidth),
+    )
+
+
+# Gaussian sampled on grid offsets, with the covariance in units of bins
+def gaussian(covariance):
+    radius = np.maximum(np.ceil(TRUNCATE * np.sqrt(np.diag(covariance))), 1)
+    offsets = np.stack(
+        np.meshgrid(
+            np.arange(-radius[0], radius[0] + 1),
+            np.arange(-radius[1], radius[1] + 1),
+            indexing="ij",
+        ),
+        axis=-1,
+    )
+    distance = np.einsum("...i,ij,...j", offsets, np.linalg.inv(covariance), offsets)
+    kernel = np.exp(-0.5 * distance)
+    return kernel / kernel.sum()
+
+
+class DensityCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.grids = OrderedDict()
+
+    # stat = column of the home team, with the away team in stat + "_AWAY"
+    def get(self, data, stat, seasons=None, **kwargs):
+        columns = [stat, stat + "_AWAY"]
+
+        if seasons is not None:
+            start, stop = seasons
+            data = data[(data.SEASON >= start) & (data.SEASON <= stop)]
+
+        # hashing the two columns is cheap next to the grid and catches new data
+        fingerprint = int(pd.util.hash_pandas_object(data[columns], index=False).sum())
+        seasons = None if seasons is None else tuple(seasons)
+        key = (stat, seasons, fingerprint, *sorted(kwargs.items()))
+
+        if key in self.grids:
+            self.grids.move_to_end(key)
+            return self.grids[key]
+
+        density = density_grid(data[columns[0]], data[columns[1]], **kwargs)
+        self.grids[key] = density
+
+        if len(self.grids) > self.maxsize:
+            self.grids.popitem(last=False)
+
+        return density
+
+    def clear(self):
+        self.grids.clear()
+
+
+cache = DensityCache()
@@ -0,0 +1,158 @@
+from collections import namedtuple
+from itertools import product, starmap
+
+import numpy as np
+import pandas as pd
+
+from databall import stats, team_stats
+
+BOX_SCORE_STATS = [
+    "FGM",
+    "FGA",
+    "FG3M",
+    "FG3A",
+    "FTM",
+    "FTA",
+    "OREB",
+    "DREB",
+    "REB",
+    "AST",
+    "TOV",
+    "STL",
+    "BLK",
+]
+
+
+def add_advanced_stats(data):
+    data["PACE"] = team_stats.pace(data)
+    data["POSSESSIONS"] = team_stats.possessions(data)
+    data["TEAM_OFF_RTG"] = team_stats.off_rating(data)
+    data["TEAM_DEF_RTG"] = team_stats.def_rating(data)
+    data["TEAM_NET_RTG"] = data["TEAM_OFF_RTG"] - data["TEAM_DEF_RTG"]
+    data["TEAM_EFG"] = stats.eff_fg_pct(data, "TEAM_")
+    data["TEAM_TOV_PCT"] = stats.tov_pct(data, "TEAM_")
+    data["TEAM_OREB_PCT"] = team_stats.oreb_pct(data)
+    data["TEAM_DREB_PCT"] = team_stats.dreb_pct(data)
+    data["TEAM_FT_PER_FGA"] = stats.ft_per_fga(data, "TEAM_")
+
+    efg = data.TEAM_EFG
+    oreb = data.TEAM_OREB_PCT
+    dreb = data.TEAM_DREB_PCT
+    ftr = data.TEAM_FT_PER_FGA
+    tov = data.TEAM_TOV_PCT
+
+    data["TEAM_FOUR_FACTORS"] = 0.4 * efg + 0.2 * oreb + 0.15 * ftr - 0.25 * tov
+    data["TEAM_FOUR_FACTORS_REB"] = (
+        0.4 * efg + 0.1 * oreb + 0.1 * dreb + 0.15 * ftr - 0.25 * tov
+    )
+
+    return data
+
+
+def add_srs(data, opponents):
+    for season in pd.unique(data.SEASON):
+        season_opponents = opponents[opponents.SEASON == season]
+        teams = pd.unique(season_opponents.TEAM_ID)
+        schedule = np.zeros([len(teams), len(teams)])
+
+        for team in teams:
+            opp = season_opponents[season_opponents.TEAM_ID == team]
+            index = np.array([x in opp.OPP_ID.values for x in teams])
+            schedule[team == teams, index] = opp.GAMES_PLAYED
+
+        schedule /= sum(season_opponents.GAMES_PLAYED) / len(teams)
+        point_diff = data[data.SEASON == season].TEAM_PLUS_MINUS.values
+        srs = point_diff
+
+        for _ in range(10):
+            srs = point_diff + schedule.dot(srs)
+
+        data.loc[data.SEASON == season, "TEAM_SRS"] = srs
+
+    return data
+
+
+def default_stat_names():
+    stat_names = ["TEAM_" + s for s in BOX_SCORE_STATS]
+    stat_names += ["OPP_" + s for s in BOX_SCORE_STATS]
+    stat_names += [
+        "TEAM_OFF_RTG",
+        "TEAM_DEF_RTG",
+        "TEAM_NET_RTG",
+        "TEAM_EFG",
+        "TEAM_TOV_PCT",
+        "TEAM_OREB_PCT",
+        "TEAM_DREB_PCT",
+        "TEAM_FT_PER_FGA",
+        "TEAM_FOUR_FACTORS",
+        "TEAM_FOUR_FACTORS_REB",
+        "PACE",
+        "POSSESSIONS",
+    ]
+    return stat_names
+
+
+def merge_betting_stats(games, data):
+    games = games.merge(
+        data,
+        left_on=["SEASON", "ID", "HOME_TEAM_ID"],
+        right_on=["SEASON", "GAME_ID", "TEAM_ID"],
+    )
+    games = games.merge(
+        data,
+        left_on=["SEASON", "ID", "AWAY_TEAM_ID"],
+        right_on=["SEASON", "GAME_ID", "TEAM_ID"],
+        suffixes=("", "_AWAY"),
+    )
+    return games[games.HOME_SPREAD_WL != "P"]
+
+
+# data = DataFrame to average over
+# stat_names = list of stats that should be averaged and shifted
+# window = number of games to average, None indicates all games are used
+# weighted = whether or not recent games are weighted more heavily, through exponential
+#            weights with a span of window games
+def windowed_stats(data, stat_names, window=None, weighted=False):
+    if weighted and window is None:
+        raise ValueError("Weighted averages need a window to set the span of weights")
+
+    data = data.copy()
+    data[stat_names] = data[stat_names].astype(float)
+    seasons = data.SEASON.unique()[1:]
+    teams = data.TEAM_ID.unique()
+    grouped = data.groupby(["SEASON", "TEAM_ID"])
+    keys = grouped.groups.keys()
+    team_season = namedtuple("team_season", ["season", "team"])
+
+    # season averages come from the data before it is windowed, so a season gives
+    # the same features whether or not the seasons before it are included
+    means = grouped[stat_names].mean()
+
+    for group in starmap(
+        team_season, [x for x in product(seasons, teams) if x in keys]
+    ):
+        g = grouped.get_group(group)
+
+        if weighted:
+            sub = g[stat_names].ewm(span=window).mean()
+        else:
+            sub = g[stat_names].expanding().mean()
+
+            if window is not None:
+                roll = g[stat_names].rolling(window=window).mean()
+                w = window - 1
+                sub = pd.concat([sub[:w], roll[w:]])
+
+        # Shift stats down one game so only previous information is used
+        sub = sub.shift(1)
+
+        # Fill in first game with average of previous season
+        previous = (group.season - 1, group.team)
+
+        if previous in keys:
+            sub.iloc[0] = means.loc[previous]
+
+        # Store subset in full DataFrame
+        data.loc[sub.index, stat_names] = sub
+
+    return data
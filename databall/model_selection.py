@@ -1,28 +1,136 @@
 from functools import partial
 
+import numpy as np
 import pandas as pd
-from hyperopt import Trials, fmin, space_eval, tpe
-from sklearn.model_selection import StratifiedKFold, cross_val_score
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import FunctionTransformer, LabelEncoder
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import (
+    accuracy_score,
+    average_precision_score,
+    confusion_matrix,
+    get_scorer,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+from sklearn.model_selection import StratifiedKFold, cross_validate
+from sklearn.preprocessing import LabelEncoder
+
+from databall.util import column_indices, stat_names
+
+
+class Experiment:
+    def __init__(self, x, y, k=6, random_state=None):
+        self.columns = {name: index for index, name in enumerate(x.columns)}
+        self.x = np.ascontiguousarray(x.to_numpy(dtype=np.float32))
+        self.y = np.asarray(y)
+        kfold = StratifiedKFold(n_splits=k, random_state=random_state)
+        self.folds = list(kfold.split(self.x, self.y))
+        self._fold_matrices = {}
+
+    def fold_matrices(self, attributes=None):
+        key = None if attributes is None else tuple(attributes)
+
+        if key not in self._fold_matrices:
+            x = self.x if key is None else self.x[:, self.indices(key)]
+            self._fold_matrices[key] = [
+                (
+                    np.ascontiguousarray(x[train]),
+                    self.y[train],
+                    np.ascontiguousarray(x[test]),
+                    self.y[test],
+                )
+                for train, test in self.folds
+            ]
+
+        return self._fold_matrices[key]
+
+    def indices(self, attributes):
+        return [self.columns[name] for name in attributes]
+
+    # column selection and fold splits are cached, so each trial only fits and scores
+    def objective(self, params, model, attributes=None, scoring="accuracy"):
+        model.set_params(**params)
+        scorer = get_scorer(scoring)
+        scores = [
+            scorer(model.fit(x_train, y_train), x_test, y_test)
+            for x_train, y_train, x_test, y_test in self.fold_matrices(attributes)
+        ]
+        return 1 - np.mean(scores)
+
+
+# out-of-fold probabilities from a single k-fold fit, shared by every metric and plot
+class FoldResults:
+    def __init__(self, model, x, y, k=10, random_state=None, n_jobs=None):
+        self.y = np.asarray(y)
+        kfold = StratifiedKFold(n_splits=k, random_state=random_state)
+        self.folds = list(kfold.split(x, self.y))
+
+        fits = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(clone(model), x, self.y, train, test)
+            for train, test in self.folds
+        )
+
+        self.classes = fits[0][1]
+        self.fold_proba = [proba for proba, _ in fits]
+        self.proba = np.empty((len(self.y), len(self.classes)))
+
+        for (_, test), proba in zip(self.folds, self.fold_proba):
+            self.proba[test] = proba
+
+    @property
+    def predictions(self):
+        return self.classes[self.proba.argmax(axis=1)]
+
+    # (true labels, probabilities) of the test games in each fold
+    def __iter__(self):
+        for (_, test), proba in zip(self.folds, self.fold_proba):
+            yield self.y[test], proba
+
+    def __len__(self):
+        return len(self.folds)
+
+    def confusion_matrix(self):
+        return confusion_matrix(self.y, self.predictions, labels=self.classes)
+
+    def scores(self):
+        scores = [fold_scores(y, proba, self.classes) for y, proba in self]
+        return list(np.mean(scores, axis=0))
+
+
+def fold_scores(y, proba, classes):
+    predictions = classes[proba.argmax(axis=1)]
+    return [
+        accuracy_score(y, predictions),
+        precision_score(y, predictions),
+        recall_score(y, predictions),
+        roc_auc_score(y, proba[:, 1]),
+        average_precision_score(y, proba[:, 1]),
+    ]
+
+
+def _fit_fold(model, x, y, train, test):
+    if hasattr(x, "iloc"):
+        model.fit(x.iloc[train], y[train])
+        return model.predict_proba(x.iloc[test]), model.classes_
 
-from databall.util import select_columns, stat_names
+    model.fit(x[train], y[train])
+    return model.predict_proba(x[test]), model.classes_
 
 
-def calculate_metrics(models, x, y, attributes, param_name, param_vec, k=6):
+def calculate_metrics(
+    models, x, y, attributes, param_name, param_vec, k=6, n_jobs=None
+):
     # Initialize list of results
     results = [[]]
 
-    # Create transformer that selects desired attributes from the DataFrame
-    selector = FunctionTransformer(
-        partial(select_columns, attributes=attributes, columns=x.columns)
-    )
+    # Select desired attributes from the DataFrame once for every model
+    x = x.to_numpy(dtype=np.float32)[:, column_indices(x.columns, attributes)]
 
     for i in range(len(models)):
         for param in param_vec:
-            # Create pipeline that selects desired attributes prior to the classifier
-            model = make_pipeline(selector, models[i](**{param_name: param}))
-            metrics = cross_val_scoring(model, x, y, k)
+            model = models[i](**{param_name: param})
+            metrics = cross_val_scoring(model, x, y, k, n_jobs=n_jobs)
 
             # Calculate performance metrics
             if i == len(results):
@@ -33,37 +141,47 @@ def calculate_metrics(models, x, y, attributes, param_name, param_vec, k=6):
     return results
 
 
-def cross_val_scoring(model, x, y, k=6, random_state=None):
+def cross_val_scoring(model, x, y, k=6, random_state=None, n_jobs=None, folds=None):
+    # Reuse fold predictions that were already computed for plotting
+    if folds is not None:
+        return folds.scores()
+
     # Define metrics
     scoring = ["accuracy", "precision", "recall", "roc_auc", "average_precision"]
 
     # Create cross validator
     kfold = StratifiedKFold(n_splits=k, random_state=random_state)
 
-    # Calculate metrics
-    return [
-        cross_val_score(model, x, y, cv=kfold, scoring=score).mean()
-        for score in scoring
-    ]
-
-
-def objective(params, model, x, y, attributes, k=6, random_state=None):
-    model.set_params(**params)
-    kfold = StratifiedKFold(n_splits=k, random_state=random_state)
-    score = cross_val_score(model, x[attributes], y, cv=kfold, scoring="accuracy")
-    return 1 - score.mean()
+    # Fit each fold once and score all metrics from its cached predictions
+    scores = cross_validate(model, x, y, cv=kfold, scoring=scoring, n_jobs=n_jobs)
+    return [scores[f"test_{score}"].mean() for score in scoring]
 
 
 def optimize_params(
-    model, x, y, attributes, space, k=6, max_evals=100, eval_space=False
+    model,
+    x,
+    y,
+    attributes,
+    space,
+    k=6,
+    max_evals=100,
+    eval_space=False,
+    n_jobs=1,
+    checkpoint=None,
+    patience=None,
 ):
-    trials = Trials()
-    best = fmin(
-        partial(objective, model=model, x=x, y=y, attributes=attributes, k=k),
+    from hyperopt import space_eval
+
+    from databall.search import search
+
+    experiment = Experiment(x, y, k=k)
+    best, trials = search(
+        partial(experiment.objective, model=model, attributes=attributes),
         space,
-        algo=tpe.suggest,
         max_evals=max_evals,
-        trials=trials,
+        n_jobs=n_jobs,
+        checkpoint=checkpoint,
+        patience=patience,
     )
 
     param_values = [t["misc"]["vals"] for t in trials.trials]
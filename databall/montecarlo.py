@@ -0,0 +1,117 @@
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from databall.profit import (
+    STANDARD_ODDS,
+    american_to_decimal,
+    confidence_stakes,
+    kelly_stakes,
+)
+
+# size is a dollar amount per game, or a fraction of the current bankroll when
+# fractional is true
+Stake = namedtuple("Stake", ["size", "fractional"])
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def flat(proba, odds, amount=100):
+    return Stake(np.full(len(proba), float(amount)), False)
+
+
+def confidence(proba, odds, max_bet=100, threshold=0.5):
+    return Stake(confidence_stakes(proba, max_bet, threshold), False)
+
+
+def kelly(proba, odds, fraction=1.0):
+    return Stake(kelly_stakes(proba, odds, balance=1, fraction=fraction), True)
+
+
+DEFAULT_RULES = {
+    "flat": flat,
+    "confidence": confidence,
+    "half_kelly": partial(kelly, fraction=0.5),
+}
+
+
+def monte_carlo(
+    proba,
+    hits=None,
+    odds=STANDARD_ODDS,
+    rules=None,
+    n_paths=5000,
+    method="outcome",
+    initial=10000,
+    ruin=0,
+    quantiles=DEFAULT_QUANTILES,
+    random_state=None,
+):
+    proba = np.asarray(proba, dtype=float)
+    odds = np.broadcast_to(np.asarray(odds, dtype=float), proba.shape)
+    rng = np.random.default_rng(random_state)
+
+    # every rule sees the same draws so their differences are not sampling noise
+    if method == "outcome":
+        index = np.broadcast_to(np.arange(len(proba)), (n_paths, len(proba)))
+        outcomes = rng.random((n_paths, len(proba))) < proba
+    elif method == "bootstrap":
+        if hits is None:
+            raise ValueError("Bootstrap resampling requires observed hits")
+
+        index = rng.integers(0, len(proba), size=(n_paths, len(proba)))
+        outcomes = np.asarray(hits, dtype=bool)[index]
+    else:
+        raise ValueError(f"Unknown resampling method {method}")
+
+    # return per dollar staked on every game of every path
+    returns = np.where(outcomes, american_to_decimal(odds)[index] - 1, -1.0)
+    summaries = {}
+
+    for name, rule in (rules or DEFAULT_RULES).items():
+        stake = rule(proba, odds)
+        wealth = bankroll_paths(stake, index, returns, initial, ruin)
+        summaries[name] = summarize(wealth, initial, ruin, quantiles)
+
+    return pd.DataFrame(summaries).T
+
+
+def bankroll_paths(stake, index, returns, initial=10000, ruin=0):
+    size = stake.size[index]
+
+    if stake.fractional:
+        wealth = initial * np.cumprod(1 + size * returns, axis=1)
+    else:
+        wealth = initial + np.cumsum(size * returns, axis=1)
+
+    # a ruined bankroll stops betting and stays at the ruin level
+    ruined = np.logical_or.accumulate(wealth <= ruin, axis=1)
+    return np.where(ruined, ruin, wealth)
+
+
+def summarize(wealth, initial=10000, ruin=0, quantiles=DEFAULT_QUANTILES):
+    profit = wealth[:, -1] - initial
+    peak = np.maximum.accumulate(np.maximum(wealth, initial), axis=1)
+    drawdown = ((peak - wealth) / peak).max(axis=1)
+
+    summary = {
+        "mean_profit": profit.mean(),
+        "std_profit": profit.std(),
+        "risk_of_ruin": np.mean(wealth[:, -1] <= ruin),
+        "mean_max_drawdown": drawdown.mean(),
+        "max_drawdown_95": np.quantile(drawdown, 0.95),
+    }
+    summary.update(
+        {
+            f"profit_{q:g}": value
+            for q, value in zip(quantiles, np.quantile(profit, quantiles))
+        }
+    )
+    return summary
+
+
+def from_simulation(results, output="HOME_SPREAD_WL", **kwargs):
+    hits = results[output] == results[output + "_PRED"]
+    return monte_carlo(results[output + "_PROBA"], hits=hits, **kwargs)
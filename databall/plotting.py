@@ -1,31 +1,44 @@
 from itertools import product
 
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from sklearn.metrics import (
-    average_precision_score,
-    precision_recall_curve,
-    roc_auc_score,
-    roc_curve,
-)
-from sklearn.model_selection import StratifiedKFold, cross_val_predict
 
-DEFAULT_CMAP = plt.get_cmap("Blues")
+DEFAULT_CMAP = "Blues"
 
 
-def cross_val_curves(model, x, y, k=10, figsize=(16, 6), legend=True):
-    fig = plt.figure(figsize=figsize)
+def cross_val_curves(
+    model,
+    x,
+    y,
+    k=10,
+    figsize=(16, 6),
+    legend=True,
+    folds=None,
+    n_jobs=None,
+    grid=None,
+    rasterized=False,
+    fig=None,
+):
+    from databall.model_selection import FoldResults
+
+    # Fit each fold once for both curves
+    if folds is None:
+        folds = FoldResults(model, x, y, k=k, n_jobs=n_jobs)
+
+    if fig is None:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+
+    kwargs = {"show_folds": True, "folds": folds, "grid": grid}
+    kwargs["rasterized"] = rasterized
 
     # Plot ROC curve
-    ax1 = plt.subplot(121)
-    cross_val_roc_curve(model, x, y, ax1, k=k, label="Mean", show_folds=True)
+    ax1 = fig.add_subplot(121)
+    cross_val_roc_curve(model, x, y, ax1, k=k, label="Mean", **kwargs)
 
     # Plot precision/recall curve
-    ax2 = plt.subplot(122)
-    cross_val_precision_recall_curve(
-        model, x, y, ax2, k=k, label="Mean", show_folds=True
-    )
+    ax2 = fig.add_subplot(122)
+    cross_val_precision_recall_curve(model, x, y, ax2, k=k, label="Mean", **kwargs)
 
     if legend:
         ax1.legend()
@@ -44,43 +57,52 @@ def cross_val_precision_recall_curve(
     label="Mean",
     show_auc=True,
     show_folds=False,
+    folds=None,
+    grid=None,
+    rasterized=False,
 ):
-    # Compute cross-validated precision/recall curve and area under the curve
-    kfold = StratifiedKFold(n_splits=k, random_state=random_state)
-    proba = cross_val_predict(model, x, y, cv=kfold, method="predict_proba")
-    mean_precision, mean_recall, thresholds = precision_recall_curve(y, proba[:, 1])
-    mean_auc = average_precision_score(y, proba[:, 1])
-
-    # Loop over k folds and get precision/recall curve for each fold
-    if show_folds:
-        for i, (train, test) in enumerate(kfold.split(x, y)):
-            # Fit model for the ith fold
-            proba = model.fit(x.iloc[train], y[train]).predict_proba(x.iloc[test])
-
-            # Compute precision/recall curve and area under the curve
-            precision, recall, thresholds = precision_recall_curve(y[test], proba[:, 1])
-            pr_auc = average_precision_score(y[test], proba[:, 1])
-            ax.plot(
-                recall,
-                precision,
-                lw=1,
-                label="Fold %d (Area = %0.2f)" % (i + 1, pr_auc),
-            )
+    from sklearn.metrics import auc, average_precision_score, precision_recall_curve
 
-        ax.plot(
-            mean_recall,
-            mean_precision,
-            "k--",
-            label=f"{label} (Area = {mean_auc:0.2f})",
-            lw=2,
-        )
-    elif show_auc:
-        ax.plot(
-            mean_recall, mean_precision, label=f"{label} (Area = {mean_auc:0.2f})", lw=2
+    from databall.model_selection import FoldResults
+
+    if folds is None:
+        folds = FoldResults(model, x, y, k=k, random_state=random_state)
+
+    grid = curve_grid(grid)
+    fold_curves = []
+
+    # Compute precision/recall curve and area under the curve for each fold
+    if show_folds or grid is not None:
+        for y_test, proba in folds:
+            precision, recall, _ = precision_recall_curve(y_test, proba[:, 1])
+
+            # recall decreases along the curve, so reverse it to interpolate
+            if grid is not None:
+                precision = np.interp(grid, recall[::-1], precision[::-1])
+                recall = grid
+
+            pr_auc = average_precision_score(y_test, proba[:, 1])
+            fold_curves.append((recall, precision, pr_auc))
+
+    # Average the fold curves on the grid, or pool every out-of-fold prediction
+    if grid is None:
+        mean_precision, mean_recall, _ = precision_recall_curve(
+            folds.y, folds.proba[:, 1]
         )
+        mean_auc = average_precision_score(folds.y, folds.proba[:, 1])
     else:
-        ax.plot(mean_recall, mean_precision, label=label, lw=2)
-
+        mean_recall = grid
+        mean_precision = np.mean([curve[1] for curve in fold_curves], axis=0)
+        mean_auc = auc(mean_recall, mean_precision)
+
+    plot_cv_curves(
+        ax,
+        (mean_recall, mean_precision, mean_auc),
+        fold_curves if show_folds else [],
+        label,
+        show_auc,
+        rasterized,
+    )
     ax.set_xlabel("Recall")
     ax.set_ylabel("Precision")
 
@@ -95,36 +117,81 @@ def cross_val_roc_curve(
     label="Mean",
     show_auc=True,
     show_folds=False,
+    folds=None,
+    grid=None,
+    rasterized=False,
 ):
-    # Compute cross-validated ROC curve and area under the curve
-    kfold = StratifiedKFold(n_splits=k, random_state=random_state)
-    proba = cross_val_predict(model, x, y, cv=kfold, method="predict_proba")
-    mean_fpr, mean_tpr, thresholds = roc_curve(y, proba[:, 1])
-    mean_auc = roc_auc_score(y, proba[:, 1])
-
-    # Loop over k folds and get ROC curve for each fold
-    if show_folds:
-        for i, (train, test) in enumerate(kfold.split(x, y)):
-            # Fit model for the ith fold
-            proba = model.fit(x.iloc[train], y[train]).predict_proba(x.iloc[test])
-
-            # Compute ROC curve and area under the curve
-            fpr, tpr, thresholds = roc_curve(y[test], proba[:, 1])
-            roc_auc = roc_auc_score(y[test], proba[:, 1])
-            ax.plot(fpr, tpr, lw=1, label="Fold %d (Area = %0.2f)" % (i + 1, roc_auc))
+    from sklearn.metrics import auc, roc_auc_score, roc_curve
 
-        ax.plot(
-            mean_fpr, mean_tpr, "k--", label=f"{label} (Area = {mean_auc:0.2f})", lw=2
-        )
-    elif show_auc:
-        ax.plot(mean_fpr, mean_tpr, label=f"{label} (Area = {mean_auc:0.2f})", lw=2)
-    else:
-        ax.plot(mean_fpr, mean_tpr, label=label, lw=2)
+    from databall.model_selection import FoldResults
+
+    if folds is None:
+        folds = FoldResults(model, x, y, k=k, random_state=random_state)
+
+    grid = curve_grid(grid)
+    fold_curves = []
+
+    # Compute ROC curve and area under the curve for each fold
+    if show_folds or grid is not None:
+        for y_test, proba in folds:
+            fpr, tpr, _ = roc_curve(y_test, proba[:, 1])
+
+            if grid is not None:
+                tpr = np.interp(grid, fpr, tpr)
+                fpr = grid
 
+            roc_auc = roc_auc_score(y_test, proba[:, 1])
+            fold_curves.append((fpr, tpr, roc_auc))
+
+    # Average the fold curves on the grid, or pool every out-of-fold prediction
+    if grid is None:
+        mean_fpr, mean_tpr, _ = roc_curve(folds.y, folds.proba[:, 1])
+        mean_auc = roc_auc_score(folds.y, folds.proba[:, 1])
+    else:
+        mean_fpr = grid
+        mean_tpr = np.mean([curve[1] for curve in fold_curves], axis=0)
+        mean_auc = auc(mean_fpr, mean_tpr)
+
+    plot_cv_curves(
+        ax,
+        (mean_fpr, mean_tpr, mean_auc),
+        fold_curves if show_folds else [],
+        label,
+        show_auc,
+        rasterized,
+    )
     ax.set_xlabel("False Positive Rate")
     ax.set_ylabel("True Positive Rate")
 
 
+# grid = number of evenly spaced points in [0, 1] or the points themselves, None
+# keeps every threshold
+def curve_grid(grid=None):
+    if grid is None or np.ndim(grid) > 0:
+        return grid
+
+    return np.linspace(0, 1, grid)
+
+
+def plot_cv_curves(ax, mean, folds, label, show_auc=True, rasterized=False):
+    for i, (x, y, area) in enumerate(folds):
+        ax.plot(
+            x,
+            y,
+            lw=1,
+            label="Fold %d (Area = %0.2f)" % (i + 1, area),
+            rasterized=rasterized,
+        )
+
+    x, y, area = mean
+    style = "k--" if len(folds) > 0 else "-"
+
+    if show_auc or len(folds) > 0:
+        label = f"{label} (Area = {area:0.2f})"
+
+    ax.plot(x, y, style, label=label, lw=2, rasterized=rasterized)
+
+
 def format_538(
     fig,
     source,
@@ -144,6 +211,8 @@ def format_538(
     suffix="",
     suffix_offset=0,
 ):
+    import matplotlib.pyplot as plt
+
     plt.style.use("fivethirtyeight")
 
     if ax is None:
@@ -282,15 +351,20 @@ def format_538(
         )
 
 
-def kde(data, stat, label, title, ax):
-    stat = "TEAM_" + stat
-    sns.kdeplot(
-        data[stat],
-        data[stat + "_AWAY"],
+def kde(data, stat, label, title, ax, seasons=None, levels=10, thresh=0.05, cache=None):
+    from databall import density
+
+    # the smoothed grid is cached per stat and season range
+    grid = (cache or density.cache).get(data, "TEAM_" + stat, seasons)
+    top = grid.z.max()
+
+    # leave the lowest densities unfilled
+    ax.contourf(
+        grid.x,
+        grid.y,
+        grid.z,
+        levels=np.linspace(thresh * top, top, levels),
         cmap="Blues",
-        shade=True,
-        shade_lowest=False,
-        ax=ax,
     )
     ax.plot(0, 0, "or", markersize=10)
     ax.set_xlabel("Home Team " + label)
@@ -308,26 +382,31 @@ def kde(data, stat, label, title, ax):
 
 
 def plot_confusion_matrix(
-    cm, classes, fig=None, title="Confusion Matrix", cmap=DEFAULT_CMAP
+    cm, classes, fig=None, title="Confusion Matrix", cmap=DEFAULT_CMAP, ax=None
 ):
     # This function prints and plots the confusion matrix.
+    if ax is None:
+        import matplotlib.pyplot as plt
+
+        ax = plt.gca()
+
+    image = ax.imshow(cm, interpolation="nearest", cmap=cmap)
+
     if fig is None:
-        fig = plt.imshow(cm, interpolation="nearest", cmap=cmap)
-    else:
-        plt.imshow(cm, interpolation="nearest", cmap=cmap)
+        fig = image
 
-    plt.title(title)
-    plt.colorbar()
+    ax.set_title(title)
+    ax.figure.colorbar(image, ax=ax)
     tick_marks = np.arange(len(classes))
-    plt.xticks(tick_marks, classes, rotation=45)
-    plt.yticks(tick_marks, classes)
-    plt.grid(visible=False)
+    ax.set_xticks(tick_marks, classes, rotation=45)
+    ax.set_yticks(tick_marks, classes)
+    ax.grid(visible=False)
 
     cm_norm = cm.astype("float") / cm.sum(axis=1)[:, np.newaxis]
     thresh = (cm.max() + cm.min()) / 2
 
     for i, j in product(range(cm.shape[0]), range(cm.shape[1])):
-        plt.text(
+        ax.text(
             j,
             i,
             "%d\n%.2f%%" % (cm[i, j], cm_norm[i, j] * 100),
@@ -335,9 +414,9 @@ def plot_confusion_matrix(
             color="white" if cm[i, j] > thresh else "black",
         )
 
-    plt.tight_layout()
-    plt.ylabel("True Label")
-    plt.xlabel("Predicted Label")
+    ax.figure.tight_layout()
+    ax.set_ylabel("True Label")
+    ax.set_xlabel("Predicted Label")
 
     return fig
 
@@ -353,8 +432,13 @@ def plot_matrix(
     logx=False,
     logy=False,
     markersize=5,
+    fig=None,
 ):
-    fig = plt.figure(figsize=figsize)
+    if fig is None:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+
     ax = []
     n = len(ylabel)
 
@@ -362,7 +446,7 @@ def plot_matrix(
         logy = [logy] * n
 
     for i in range(n):
-        ax += [plt.subplot(rows, cols, i + 1)]
+        ax += [fig.add_subplot(rows, cols, i + 1)]
 
         if logx and logy[i]:
             ax[i].loglog(x, y[:, i], ".", markersize=markersize)
@@ -379,15 +463,21 @@ def plot_matrix(
     return fig, ax
 
 
-def plot_metrics(x, y, xlabel, legend=None, legendsize=14, figsize=(16, 8), log=False):
+def plot_metrics(
+    x, y, xlabel, legend=None, legendsize=14, figsize=(16, 8), log=False, fig=None
+):
+    if fig is None:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+
     rows = 2
     cols = 3
     ylabel = ["Accuracy", "Precision", "Recall", "ROC Area", "Precision/Recall Area"]
-    fig = plt.figure(figsize=figsize)
     ax = []
 
     for i in range(len(ylabel)):
-        ax += [plt.subplot(100 * rows + 10 * cols + i + 1)]
+        ax += [fig.add_subplot(100 * rows + 10 * cols + i + 1)]
 
         if log:
             [ax[i].semilogx(x, [yvec[i] for yvec in y[j]]) for j in range(len(y))]
@@ -402,6 +492,6 @@ def plot_metrics(x, y, xlabel, legend=None, legendsize=14, figsize=(16, 8), log=
         if legend is not None:
             ax[i].legend(legend, fontsize=legendsize)
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     return fig, ax
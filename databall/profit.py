@@ -1,32 +1,73 @@
 import numpy as np
+import pandas as pd
 
+EVEN_ODDS = 100
+STANDARD_ODDS = -110
 
-def profit(data, var_predict="HOME_SPREAD_WL", bet_amount=100):
-    grouped = data.groupby("GAME_DATE")
-    num_games = 0
-    days = []
-    cumulative_correct = []
-    cumulative_percent = []
-    cumulative_profit = []
-    cumulative_investment = []
-
-    for day in grouped.groups:
-        games = grouped.get_group(day)
-        num = len(games)
-        num_games += num
-        days += [day]
-        num_correct = sum(games[var_predict] == games[var_predict + "_PRED"])
-        daily_profit = bet_amount * num_correct - bet_amount * (num - num_correct)
-
-        if len(cumulative_correct) == 0:
-            cumulative_correct += [num_correct]
-            cumulative_profit += [daily_profit]
-            cumulative_investment += [bet_amount * num]
-        else:
-            cumulative_correct += [num_correct + cumulative_correct[-1]]
-            cumulative_profit += [daily_profit + cumulative_profit[-1]]
-            cumulative_investment += [bet_amount * num + cumulative_investment[-1]]
-
-        cumulative_percent += [cumulative_correct[-1] / num_games]
-
-    return days, np.array(cumulative_percent), np.array(cumulative_profit)
+
+def american_to_decimal(odds):
+    odds = np.asarray(odds, dtype=float)
+    return np.where(odds > 0, 1 + odds / 100, 1 - 100 / odds)
+
+
+def bankroll(
+    data,
+    var_predict="HOME_SPREAD_WL",
+    stakes=100,
+    odds=STANDARD_ODDS,
+    push="P",
+    date="GAME_DATE",
+):
+    actual = data[var_predict].to_numpy()
+
+    # without a push outcome every game is either won or lost
+    if push is None:
+        pushes = np.zeros(len(data), dtype=bool)
+    else:
+        pushes = actual == push
+
+    hits = (actual == data[var_predict + "_PRED"].to_numpy()) & ~pushes
+    stakes = np.broadcast_to(np.asarray(stakes, dtype=float), len(data))
+
+    # pushes return the stake, wins pay out at the given odds
+    payout = stakes * (american_to_decimal(odds) - 1)
+    profits = np.where(pushes, 0.0, np.where(hits, payout, -stakes))
+
+    # sum each day with one bincount per column instead of a loop over groups
+    index, days = pd.factorize(data[date], sort=True)
+    daily = {
+        "games": np.bincount(index, minlength=len(days)),
+        "correct": np.bincount(index, weights=hits, minlength=len(days)),
+        "pushes": np.bincount(index, weights=pushes, minlength=len(days)),
+        "investment": np.bincount(index, weights=stakes, minlength=len(days)),
+        "profit": np.bincount(index, weights=profits, minlength=len(days)),
+    }
+    cumulative = {f"cumulative_{key}": np.cumsum(value) for key, value in daily.items()}
+    decided = cumulative["cumulative_games"] - cumulative["cumulative_pushes"]
+    cumulative["cumulative_percent"] = cumulative["cumulative_correct"] / decided
+    cumulative["roi"] = (
+        cumulative["cumulative_profit"] / cumulative["cumulative_investment"]
+    )
+    return pd.DataFrame(daily | cumulative, index=pd.Index(days, name=date))
+
+
+def confidence_stakes(proba, max_bet=100, threshold=0.5):
+    scale = (np.asarray(proba, dtype=float) - threshold) / (1 - threshold)
+    return max_bet * np.clip(scale, 0, 1)
+
+
+def kelly_stakes(proba, odds=STANDARD_ODDS, balance=10000, fraction=1.0):
+    proba = np.asarray(proba, dtype=float)
+    net_odds = american_to_decimal(odds) - 1
+    kelly = (proba * net_odds - (1 - proba)) / net_odds
+    return balance * fraction * np.clip(kelly, 0, None)
+
+
+# pushes count as lost bets and missed predictions unless a push outcome is given
+def profit(data, var_predict="HOME_SPREAD_WL", bet_amount=100, push=None):
+    daily = bankroll(data, var_predict, stakes=bet_amount, odds=EVEN_ODDS, push=push)
+    return (
+        list(daily.index),
+        daily.cumulative_percent.to_numpy(),
+        daily.cumulative_profit.to_numpy(),
+    )
@@ -0,0 +1,183 @@
+import html
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from databall.profit import STANDARD_ODDS, american_to_decimal, bankroll
+
+DEFAULT_FORMATS = ("png", "svg")
+DEFAULT_GRID = 200
+FIGSIZE = (12, 5)
+
+
+# runs = mapping of run name to simulate results, folds = optional mapping of run
+# name to FoldResults for the cross-validated curves
+def build_report(
+    runs,
+    directory,
+    output="HOME_SPREAD_WL",
+    folds=None,
+    formats=DEFAULT_FORMATS,
+    n_jobs=None,
+    title="DataBall model report",
+):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    folds = folds or {}
+
+    names = [str(name) for name in runs]
+    slugs = unique_slugs(names)
+    results = list(runs.values())
+    fold_results = [folds.get(name) for name in runs]
+    render = partial(render_run, directory=directory, output=output, formats=formats)
+
+    # every figure is drawn on its own Figure without pyplot, so runs can be
+    # rendered in separate processes without a display
+    if n_jobs is None or n_jobs == 1:
+        pages = list(map(render, names, slugs, results, fold_results))
+    else:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            pages = list(pool.map(render, names, slugs, results, fold_results))
+
+    index = directory / "index.html"
+    index.write_text(index_html(pages, title, formats[0]))
+    return index
+
+
+# names like "lr 1" and "lr-1" map to the same slug, so later ones get a numbered
+# suffix instead of overwriting the first run's figures
+def unique_slugs(names):
+    slugs = []
+    seen = set()
+
+    for name in names:
+        base = re.sub(r"[^\w.-]+", "-", name).strip("-") or "run"
+        slug = base
+        suffix = 2
+
+        # compare case-insensitively for filesystems that ignore case
+        while slug.casefold() in seen:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+
+        seen.add(slug.casefold())
+        slugs.append(slug)
+
+    return slugs
+
+
+def render_run(name, slug, results, folds, directory, output, formats=DEFAULT_FORMATS):
+    run_directory = Path(directory, slug)
+    run_directory.mkdir(parents=True, exist_ok=True)
+
+    daily = bankroll(results, output)
+    figures = {
+        "bankroll": partial(bankroll_figure, daily),
+        "confusion": partial(confusion_figure, results, output),
+    }
+
+    if folds is not None:
+        figures["curves"] = partial(curves_figure, folds)
+
+    for figure_name, draw in figures.items():
+        fig = new_figure()
+        draw(fig)
+
+        for extension in formats:
+            fig.savefig(run_directory / f"{figure_name}.{extension}")
+
+    return {
+        "name": name,
+        "slug": slug,
+        "figures": list(figures),
+        "games": len(results),
+        "accuracy": daily.cumulative_percent.iloc[-1],
+        "profit": daily.cumulative_profit.iloc[-1],
+        "roi": daily.roi.iloc[-1],
+    }
+
+
+def new_figure(figsize=FIGSIZE):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def bankroll_figure(daily, fig):
+    ax1, ax2 = fig.subplots(1, 2)
+    ax1.plot(daily.index, daily.cumulative_profit)
+    ax1.set_xlabel("Date")
+    ax1.set_ylabel("Profit ($)")
+    ax2.plot(daily.index, 100 * daily.cumulative_percent)
+    break_even = 100 / american_to_decimal(STANDARD_ODDS)
+    ax2.axhline(break_even, color="black", linestyle="--", label="Break even")
+    ax2.set_xlabel("Date")
+    ax2.set_ylabel("Accuracy (%)")
+    ax2.legend()
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+
+def confusion_figure(results, output, fig):
+    from sklearn.metrics import confusion_matrix
+
+    from databall.plotting import plot_confusion_matrix
+
+    classes = sorted(set(results[output]) | set(results[output + "_PRED"]))
+    cm = confusion_matrix(results[output], results[output + "_PRED"], labels=classes)
+    plot_confusion_matrix(cm, classes, fig=fig, ax=fig.add_subplot(111))
+
+
+def curves_figure(folds, fig):
+    from databall.plotting import cross_val_curves
+
+    cross_val_curves(
+        None, None, None, folds=folds, grid=DEFAULT_GRID, rasterized=True, fig=fig
+    )
+    fig.tight_layout()
+
+
+def index_html(pages, title, extension="png"):
+    rows = "\n".join(
+        f"<tr><td><a href='#{html.escape(page['slug'])}'>"
+        f"{html.escape(page['name'])}</a></td><td>{page['games']}</td>"
+        f"<td>{page['accuracy']:.3f}</td><td>{page['profit']:.2f}</td>"
+        f"<td>{page['roi']:.3f}</td></tr>"
+        for page in pages
+    )
+    sections = "\n".join(
+        f"<h2 id='{html.escape(page['slug'])}'>{html.escape(page['name'])}</h2>\n"
+        + "\n".join(
+            f"<img src='{html.escape(page['slug'])}/{figure}.{extension}' "
+            f"alt='{figure}'>"
+            for figure in page["figures"]
+        )
+        for page in pages
+    )
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 0.3em 0.8em; text-align: right; }}
+img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<table>
+<tr><th>Run</th><th>Games</th><th>Accuracy</th><th>Profit</th><th>ROI</th></tr>
+{rows}
+</table>
+{sections}
+</body>
+</html>
+"""
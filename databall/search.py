@@ -0,0 +1,125 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from hyperopt import JOB_STATE_DONE, STATUS_OK, Domain, Trials, space_eval, tpe
+
+# objective shared with search worker processes
+_shared = {}
+
+
+def search(
+    objective,
+    space,
+    max_evals=100,
+    n_jobs=1,
+    batch_size=None,
+    checkpoint=None,
+    patience=None,
+    tol=0.0,
+    random_state=None,
+):
+    trials = load_trials(checkpoint)
+    domain = Domain(objective, space)
+    rng = np.random.default_rng(random_state)
+    batch_size = batch_size or n_jobs
+    pool = None
+
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(n_jobs, initializer=_share, initargs=(objective,))
+
+    try:
+        while len(trials.trials) < max_evals and not plateau(
+            trials.losses(), patience, tol
+        ):
+            num_trials = min(batch_size, max_evals - len(trials.trials))
+            tids = [suggest(domain, trials, rng) for _ in range(num_trials)]
+            docs = [doc for doc in trials.trials if doc["tid"] in tids]
+            params = [space_eval(space, values(doc)) for doc in docs]
+
+            if pool is None:
+                losses = map(objective, params)
+            else:
+                losses = pool.map(_evaluate, params)
+
+            for doc, loss in zip(docs, losses):
+                doc["state"] = JOB_STATE_DONE
+                doc["result"] = {"loss": float(loss), "status": STATUS_OK}
+                doc["refresh_time"] = datetime.now(timezone.utc)
+
+            trials.refresh()
+
+            # only completed batches are saved, so a resumed search has no stale trials
+            if checkpoint is not None:
+                save_trials(trials, checkpoint)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return trials.argmin, trials
+
+
+# trials that are suggested but not yet evaluated count as infinite loss, which
+# steers TPE away from points already pending in the same batch
+def suggest(domain, trials, rng):
+    new_ids = trials.new_trial_ids(1)
+    docs = tpe.suggest(new_ids, domain, trials, int(rng.integers(2**31 - 1)))
+    tids = trials.insert_trial_docs(docs)
+    trials.refresh()
+    return tids[0]
+
+
+def values(doc):
+    return {key: value[0] for key, value in doc["misc"]["vals"].items() if value}
+
+
+def plateau(losses, patience=None, tol=0.0):
+    if patience is None or len(losses) <= patience:
+        return False
+
+    # losses that only tie the best so far count as a plateau too
+    return min(losses[:-patience]) - min(losses[-patience:]) <= tol
+
+
+# searches over different training data must not resume each other's trials, so the
+# checkpoint file name carries a hash of the data
+def checkpoint_path(checkpoint, *data):
+    digest = hashlib.sha256()
+
+    for values in data:
+        df = pd.DataFrame(values)
+        digest.update(str(list(df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+    path = Path(checkpoint)
+    return path.with_name(f"{path.stem}-{digest.hexdigest()[:16]}{path.suffix}")
+
+
+def load_trials(checkpoint=None):
+    if checkpoint is None or not Path(checkpoint).exists():
+        return Trials()
+
+    with open(checkpoint, "rb") as f:
+        return pickle.load(f)
+
+
+def save_trials(trials, checkpoint):
+    temp = Path(f"{checkpoint}.{os.getpid()}.tmp")
+
+    with open(temp, "wb") as f:
+        pickle.dump(trials, f)
+
+    os.replace(temp, checkpoint)
+
+
+def _evaluate(params):
+    return _shared["objective"](params)
+
+
+def _share(objective):
+    _shared["objective"] = objective
@@ -1,10 +1,35 @@
-from hyperopt import fmin, space_eval, tpe
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
 from sklearn.preprocessing import LabelEncoder
 
+from databall import telemetry
+from databall.model_selection import Experiment
+
+# training data shared with walk-forward worker processes
+_shared = {}
+
 
-def simulate(model, data, season, predictors, output, build=None, evolve=False, freq=1):
+@telemetry.traced("simulate")
+def simulate(
+    model,
+    data,
+    season,
+    predictors,
+    output,
+    build=None,
+    evolve=False,
+    freq=1,
+    n_jobs=None,
+    incremental=False,
+    proba=False,
+):
     result = output + "_PRED"
+    method = "predict_proba" if proba else "predict"
     data = data.copy()
     encoder = LabelEncoder().fit(data[output])
     data[output] = encoder.transform(data[output])
@@ -13,56 +38,208 @@ def simulate(model, data, season, predictors, output, build=None, evolve=False,
     if build is None:
         build = fit
 
+    # evolve leaves model fitted at the last checkpoint, except when the checkpoints
+    # are fit in parallel or updated incrementally, which both work on copies of it
     if evolve:
-        test[result] = test[output]
-        test_groups = test.groupby("GAME_DATE")
-        count = 0
-
-        for day in test_groups.groups:
-            if count in {freq, 0}:
-                build(model, train[predictors], train[output])
-                count = 0
-
-            games = test_groups.get_group(day)
-            test.loc[games.index, [result]] = model.predict(games[predictors])
-            train = train.append(games)
-            count += 1
+        order = np.argsort(test.GAME_DATE.values, kind="stable")
+        games = test.iloc[order]
+        predictions = walk_forward(
+            model,
+            build,
+            pd.concat([train[predictors], games[predictors]]),
+            np.concatenate([train[output].values, games[output].values]),
+            len(train),
+            games.GAME_DATE.values,
+            freq=freq,
+            n_jobs=n_jobs,
+            incremental=incremental,
+            method=method,
+        )
+        predictions = pd.DataFrame(predictions, index=games.index).loc[test.index]
     else:
         build(model, train[predictors], train[output])
-        test[result] = model.predict(test[predictors])
+        predictions = getattr(model, method)(test[predictors])
+
+    # store the probability of the predicted outcome alongside the prediction
+    if proba:
+        predictions = np.asarray(predictions)
+        test[output + "_PROBA"] = predictions.max(axis=1)
+        predictions = predictions.argmax(axis=1)
 
+    test[result] = np.asarray(predictions).ravel()
     test[output] = encoder.inverse_transform(test[output])
     test[result] = encoder.inverse_transform(test[result])
+    telemetry.count("games", len(test))
     return test
 
 
 def fit(model, x, y):
-    model.fit(x, y)
+    with telemetry.span("fit", model=type(model).__name__) as span:
+        span.count("rows", len(x))
+        model.fit(x, y)
+
+
+# x and y hold the training games followed by the test games sorted by date, so the
+# training set at every checkpoint is a prefix of the same arrays
+def walk_forward(
+    model,
+    build,
+    x,
+    y,
+    num_train,
+    dates,
+    freq=1,
+    n_jobs=None,
+    incremental=False,
+    method="predict",
+):
+    _, day_starts = np.unique(dates, return_index=True)
+    starts = num_train + np.sort(day_starts)[::freq]
+    stops = np.append(starts[1:], len(x))
+    predictions = []
+
+    # updates call partial_fit or fit on the model directly, so they would skip any
+    # other build such as a hyperparameter search
+    if incremental and build is not fit:
+        raise ValueError("Incremental updates cannot be combined with a custom build")
+
+    # each update depends on the previous model, so incremental fits are sequential,
+    # and they work on a copy since warm starts change the model's parameters
+    if incremental or n_jobs is None or n_jobs == 1:
+        update = None
+        previous = None
+
+        if incremental:
+            model = clone(model)
+            update = incremental_update(model, x, y)
+
+        for start, stop in zip(starts, stops):
+            if update is not None and previous is not None:
+                update(previous, start)
+            else:
+                build(model, x.iloc[:start], y[:start])
+
+            predictions.append(getattr(model, method)(x.iloc[start:stop]))
+            previous = start
+
+        return np.concatenate(predictions)
+
+    # checkpoint models are independent, so fit them all at once in worker processes
+    with ProcessPoolExecutor(n_jobs, initializer=_share, initargs=(x, y)) as pool:
+        models = pool.map(partial(_fit_checkpoint, model, build), starts)
+
+        for start, stop, checkpoint in zip(starts, stops, models):
+            predictions.append(getattr(checkpoint, method)(x.iloc[start:stop]))
+
+    return np.concatenate(predictions)
+
+
+def incremental_update(model, x, y):
+    if hasattr(model, "partial_fit"):
+        classes = np.unique(y)
+
+        # only feed the games played since the previous checkpoint
+        def update(previous, start):
+            model.partial_fit(
+                x.iloc[previous:start], y[previous:start], classes=classes
+            )
+
+        return update
+
+    if "warm_start" in model.get_params():
+        model.set_params(warm_start=True)
+        size = ensemble_size(model)
+
+        # warm started estimators refit from the previous solution, which converges
+        # in far fewer iterations than a cold start, but ensembles only fit estimators
+        # added since the last fit so they grow in proportion to the training games
+        def update(previous, start):
+            if size is not None:
+                grown = math.ceil(model.get_params()[size] * start / previous)
+                model.set_params(**{size: grown})
+
+            model.fit(x.iloc[:start], y[:start])
+
+        return update
+
+    raise ValueError(
+        f"{type(model).__name__} supports neither partial_fit nor warm_start"
+    )
+
+
+# the parameter counting the estimators or boosting iterations of an ensemble, while
+# models such as linear ones refit their whole solution on every warm start
+def ensemble_size(model):
+    from sklearn.ensemble import (
+        HistGradientBoostingClassifier,
+        HistGradientBoostingRegressor,
+    )
+
+    if isinstance(
+        model, (HistGradientBoostingClassifier, HistGradientBoostingRegressor)
+    ):
+        return "max_iter"
+
+    if "n_estimators" in model.get_params():
+        return "n_estimators"
+
+    return None
+
+
+def _fit_checkpoint(model, build, stop):
+    model = clone(model)
+    build(model, _shared["x"].iloc[:stop], _shared["y"][:stop])
+    return model
+
+
+def _share(x, y):
+    _shared["x"] = x
+    _shared["y"] = y
 
 
 class HyperOptFit:
     def __init__(
-        self, space, max_evals=10, n_splits=10, scoring="roc_auc", random_state=None
+        self,
+        space,
+        max_evals=10,
+        n_splits=10,
+        scoring="roc_auc",
+        random_state=None,
+        n_jobs=1,
+        checkpoint=None,
+        patience=None,
     ):
         self.space = space
         self.max_evals = max_evals
         self.n_splits = n_splits
         self.scoring = scoring
         self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.checkpoint = checkpoint
+        self.patience = patience
 
     def fit(self, model, x, y):
-        best = fmin(
-            lambda params: self.objective(model, params, x, y),
+        # hyperopt is only needed when a search actually runs
+        from hyperopt import space_eval
+
+        from databall.search import checkpoint_path, search
+
+        checkpoint = self.checkpoint
+
+        # walk-forward retrains and parallel checkpoint fits each search their own
+        # training set, so each one resumes from its own file
+        if checkpoint is not None:
+            checkpoint = checkpoint_path(checkpoint, x, y)
+
+        experiment = Experiment(x, y, k=self.n_splits, random_state=self.random_state)
+        best, _ = search(
+            partial(experiment.objective, model=model, scoring=self.scoring),
             self.space,
-            algo=tpe.suggest,
             max_evals=self.max_evals,
+            n_jobs=self.n_jobs,
+            checkpoint=checkpoint,
+            patience=self.patience,
         )
         best_params = space_eval(self.space, best)
         model.set_params(**best_params)
         model.fit(x, y)
-
-    def objective(self, model, params, x, y):
-        model.set_params(**params)
-        cv = StratifiedKFold(n_splits=self.n_splits, random_state=self.random_state)
-        score = cross_val_score(model, x, y, cv=cv, scoring=self.scoring)
-        return 1 - score.mean()
@@ -0,0 +1,205 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+DEFAULT_MAX_SPANS = 10000
+DEFAULT_PROFILE_LINES = 15
+
+logger = logging.getLogger("databall.telemetry")
+
+# profiling is expensive, so it is off unless switched on here or in the environment
+settings = {"profile": os.environ.get("DATABALL_PROFILE", "") not in ("", "0")}
+
+_current = ContextVar("span", default=None)
+
+
+class Span:
+    def __init__(self, name, parent=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.counters = {}
+        self.start = time.time()
+        self.duration = None
+        self.profile = None
+        self.memory = None
+
+    def count(self, key, value=1):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_dict(self):
+        record = {
+            "span": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "start": self.start,
+            "duration": self.duration,
+            **self.attributes,
+            **self.counters,
+        }
+
+        if self.memory is not None:
+            record.update(self.memory)
+
+        if self.profile is not None:
+            record["profile"] = self.profile
+
+        return record
+
+
+class Registry:
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self.lock = threading.Lock()
+
+    def record(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+
+    def to_frame(self):
+        import pandas as pd
+
+        with self.lock:
+            return pd.DataFrame([span.to_dict() for span in self.spans])
+
+    # total time and counters per span name, with the largest memory peak
+    def summary(self):
+        import pandas as pd
+
+        with self.lock:
+            data = pd.DataFrame(
+                [
+                    {"span": span.name, "duration": span.duration, **span.counters}
+                    | (span.memory or {})
+                    for span in self.spans
+                ]
+            )
+
+        if data.empty:
+            return data
+
+        groups = data.groupby("span")
+        memory = ["memory_current", "memory_peak"]
+        summary = groups.sum().drop(columns=memory, errors="ignore")
+        summary = summary.join(groups[data.columns.intersection(memory)].max())
+        summary.insert(0, "calls", groups.size())
+        return summary.sort_values("duration", ascending=False)
+
+
+registry = Registry()
+
+
+@contextmanager
+def span(name, profile=None, **attributes):
+    parent = _current.get()
+    current = Span(name, parent, **attributes)
+    token = _current.set(current)
+
+    # only the outermost profiled span owns the profiler since they cannot nest
+    profile = settings["profile"] if profile is None else profile
+    profile = profile and not _profiling(parent)
+    profiler = start_profile() if profile else None
+    current.attributes["profiled"] = profile
+    start = time.perf_counter()
+
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+
+        if profiler is not None:
+            current.profile, current.memory = stop_profile(*profiler)
+
+        _current.reset(token)
+        registry.record(current)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(current.to_dict(), default=str))
+
+
+def traced(name, **attributes):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(key, value=1):
+    current = _current.get()
+
+    if current is not None:
+        current.count(key, value)
+
+
+def current_span():
+    return _current.get()
+
+
+def _profiling(span):
+    while span is not None:
+        if span.attributes.get("profiled"):
+            return True
+
+        span = span.parent
+
+    return False
+
+
+def start_profile():
+    tracing = tracemalloc.is_tracing()
+
+    if not tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, tracing
+
+
+def stop_profile(profiler, tracing, lines=DEFAULT_PROFILE_LINES):
+    profiler.disable()
+    current, peak = tracemalloc.get_traced_memory()
+
+    if not tracing:
+        tracemalloc.stop()
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats("cumulative").print_stats(lines)
+    memory = {"memory_current": current, "memory_peak": peak}
+    return output.getvalue(), memory
+
+
+def enable_profiling(enabled=True):
+    settings["profile"] = enabled
+
+
+# one JSON object per line, written to a file or stderr
+def log_to(path=None, level=logging.INFO):
+    handler = logging.StreamHandler() if path is None else logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
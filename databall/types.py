@@ -1,10 +1,5 @@
 from enum import Enum
 
-from nba_api.stats.library.parameters import (
-    PlayerOrTeamAbbreviation,
-    SeasonTypePlayoffs,
-)
-
 
 class GameResult(str, Enum):
     WIN = "W"
@@ -17,9 +12,11 @@ class OverUnderResult(str, Enum):
     PUSH = "P"
 
 
+# the values mirror nba_api's SeasonTypePlayoffs and PlayerOrTeamAbbreviation
+# parameters, so importing the tables does not load nba_api
 class SeasonType(str, Enum):
-    REGULAR = SeasonTypePlayoffs.regular
-    PLAYOFFS = SeasonTypePlayoffs.playoffs
+    REGULAR = "Regular Season"
+    PLAYOFFS = "Playoffs"
 
 
 class SpreadResult(str, Enum):
@@ -29,5 +26,5 @@ class SpreadResult(str, Enum):
 
 
 class StatsType(str, Enum):
-    PLAYER = PlayerOrTeamAbbreviation.player
-    TEAM = PlayerOrTeamAbbreviation.team
+    PLAYER = "P"
+    TEAM = "T"
@@ -1,21 +1,21 @@
-from IPython.display import HTML, display
-
-
 def print_df(df):
+    from IPython.display import HTML, display
+
     display(HTML(df.to_html(index=False)))
 
 
-def select_columns(data, attributes, columns):
-    return data[
-        :,
-        [
-            index
-            for index, col in enumerate(columns)
-            if any(name in col for name in attributes)
-        ],
+def column_indices(columns, attributes):
+    return [
+        index
+        for index, col in enumerate(columns)
+        if any(name in col for name in attributes)
     ]
 
 
+def select_columns(data, attributes, columns):
+    return data[:, column_indices(columns, attributes)]
+
+
 def stat_names():
     basic = [
         "FGM",
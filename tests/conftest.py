@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# the session engine is created on import, so point it at a scratch database before
+# any test imports databall.db
+os.environ.setdefault(
+    "DATABALL_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='databall-'), 'test.db')}",
+)
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from databall.benchmarks import synthetic
+from databall.db import Covers, Games, Players, PlayerStats, Teams, TeamStats
+from databall.db.analytics import Analytics
+from databall.db.base import Base
+
+
+@pytest.fixture(scope="module")
+def analytics(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'nba.db'}")
+    Base.metadata.create_all(engine)
+    tables = synthetic.generate([2015, 2016, 2017], teams=6, players=2, games=10)
+
+    for table in [Teams, Players, Games, Covers, TeamStats, PlayerStats]:
+        tables[table.__tablename__].to_sql(
+            table.__tablename__, engine, if_exists="append", index=False
+        )
+
+    yield Analytics(engine)
+    engine.dispose()
+
+
+def test_game_stats_filters_seasons(analytics):
+    data = analytics.game_stats(start_season=2016, stop_season=2016)
+
+    assert set(data.SEASON) == {2016}
+    assert (data.TEAM_ID != data.OPP_ID).all()
+
+
+@pytest.mark.parametrize("window", [None, 3])
+def test_betting_stats_filtered_like_full_history(analytics, window):
+    full = analytics.betting_stats(window=window)
+    season = analytics.betting_stats(window=window, start_season=2017)
+
+    full = full[full.SEASON == 2017].reset_index(drop=True)
+    pd.testing.assert_frame_equal(full, season.reset_index(drop=True))
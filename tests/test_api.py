@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from nba_api.stats.endpoints.leaguegamelog import LeagueGameLog
+from nba_api.stats.library.http import NBAStatsHTTP
+
+from databall import api
+
+GAME_LOG = {
+    "resource": "leaguegamelog",
+    "parameters": {},
+    "resultSets": [
+        {
+            "name": "LeagueGameLog",
+            "headers": ["SEASON_ID", "TEAM_ID", "GAME_ID", "MATCHUP"],
+            "rowSet": [["22015", 1610612737, "0021500001", "ATL vs. DET"]],
+        }
+    ],
+}
+
+
+# a stand-in for stats.nba.com that answers each request with the next scripted
+# response, where "error" is a server error page and "hang" never answers in time
+class FakeStats(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        response = server.script.pop(0) if server.script else "ok"
+
+        if response == "hang":
+            server.release.wait(5)
+            return
+
+        if response == "error":
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b"<html>Internal Server Error</html>")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(GAME_LOG).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStats)
+    server.script = []
+    server.requests = []
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(NBAStatsHTTP, "base_url", NBAStatsHTTP.base_url)
+    monkeypatch.setattr(api, "breaker", api.CircuitBreaker())
+    monkeypatch.setitem(
+        api.settings, "base_url", f"http://127.0.0.1:{server.server_port}"
+    )
+    monkeypatch.setitem(api.settings, "timeout", 0.5)
+    monkeypatch.setitem(api.settings, "attempts", 3)
+    monkeypatch.setitem(api.settings, "backoff", 1.0)
+    monkeypatch.setitem(api.settings, "failure_threshold", 5)
+    monkeypatch.setitem(api.settings, "cooldown", 60.0)
+    yield server
+
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # record backoff and cooldown sleeps instead of waiting, without jitter
+    sleeps = []
+    monkeypatch.setattr(api.time, "sleep", sleeps.append)
+    monkeypatch.setattr(api.random, "random", lambda: 0.5)
+    return sleeps
+
+
+def test_fetch_retries_errors_and_timeouts(server, sleeps):
+    server.script = ["error", "hang", "ok"]
+
+    endpoint = api.fetch(LeagueGameLog, season=2015)
+
+    assert len(endpoint.get_data_frames()[0]) == 1
+    assert len(server.requests) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_fetch_gives_up_after_last_attempt(server, sleeps):
+    server.script = ["error"] * 5
+
+    with pytest.raises(ValueError):
+        api.fetch(LeagueGameLog, season=2015)
+
+    assert len(server.requests) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_circuit_breaker_pauses_requests(server, sleeps, monkeypatch):
+    monkeypatch.setitem(api.settings, "failure_threshold", 2)
+    server.script = ["error", "error", "ok"]
+
+    api.fetch(LeagueGameLog, season=2015)
+
+    # the second failure opens the circuit, so the last attempt waits out the cooldown
+    assert sleeps[:2] == [1.0, 2.0]
+    assert sleeps[2] == pytest.approx(60.0, abs=1.0)
+    assert api.breaker.failures == 0
+
+
+def test_retry_calls_on_retry_before_each_sleep(sleeps):
+    errors = []
+
+    def func(attempt):
+        if attempt < 3:
+            raise KeyError(attempt)
+        return attempt
+
+    assert api.retry(func, 3, 0.5, on_retry=lambda e, a: errors.append(a)) == 3
+    assert errors == [1, 2]
+    assert sleeps == [0.5, 1.0]
+
+
+def test_rate_limiter_is_shared_by_workers(monkeypatch):
+    # no jitter, so requests are exactly one delay apart
+    monkeypatch.setattr(api.random, "random", lambda: 0.5)
+    limiter = api.RateLimiter(0.02)
+    times = []
+    start = time.monotonic()
+
+    def request():
+        limiter.wait()
+        times.append(time.monotonic())
+
+    with ThreadPoolExecutor(4) as pool:
+        for _ in range(12):
+            pool.submit(request)
+
+    # twelve requests need eleven delays, however many workers send them
+    assert max(times) - start >= 11 * 0.02
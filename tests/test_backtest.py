@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from databall.backtest import run_backtest
+
+
+def games(seasons=(2018, 2019), n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        {
+            "SEASON": np.repeat(seasons, n),
+            "GAME_DATE": np.tile(pd.date_range("2020-01-01", periods=n), len(seasons)),
+            "X": rng.normal(size=n * len(seasons)),
+        }
+    )
+    data["HOME_SPREAD_WL"] = np.where(data.X > 0, "W", "L")
+    return data
+
+
+def test_run_backtest():
+    row = run_backtest(
+        "lr", LogisticRegression(), 2019, games(), ["X"], "HOME_SPREAD_WL"
+    )
+
+    assert row["games"] == 40
+    assert 0 <= row["accuracy"] <= 1
+    assert row["profit"] == pytest.approx(row["roi"] * 4000)
+
+
+def test_run_backtest_without_games():
+    row = run_backtest(
+        "lr", LogisticRegression(), 2020, games(), ["X"], "HOME_SPREAD_WL"
+    )
+
+    assert row["games"] == 0
+    assert np.isnan(row["accuracy"])
+    assert row["profit"] == 0
+    assert np.isnan(row["roi"])
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from databall.db import Journal, builder
+from databall.db.session import engine
+from databall.types import SeasonType
+
+
+class FakeTable:
+    def __init__(self, name, fail=()):
+        self.__tablename__ = name
+        self.fail = list(fail)
+        self.calls = []
+
+    def populate(self, *args, **kwargs):
+        call = (*args, *kwargs.values())
+        self.calls.append(call)
+
+        if call in self.fail:
+            self.fail.remove(call)
+            raise RuntimeError("Download failed")
+
+
+def source(season, season_type):
+    return pd.DataFrame({"season": [season], "season_type": [season_type.name]})
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    Journal.__table__.drop(engine, checkfirst=True)
+    games = FakeTable("games")
+    stats = FakeTable("stats", fail=[(2001, SeasonType.PLAYOFFS)])
+    covers = FakeTable("covers")
+
+    monkeypatch.setattr(builder, "TABLES", {games: source, stats: source})
+    monkeypatch.setattr(builder, "CURRENT_SEASON", 2100)
+    monkeypatch.setattr(builder, "Covers", covers)
+    monkeypatch.setattr(builder.db_settings, "ATTEMPTS", 1, raising=False)
+    return games, stats, covers
+
+
+def test_populate_resumes_failed_units(tables):
+    games, stats, covers = tables
+
+    with pytest.raises(RuntimeError, match="2001 PLAYOFFS"):
+        builder.populate(2000, 2001, delay=0)
+
+    assert len(games.calls) == len(stats.calls) == 4
+    assert covers.calls == []
+
+    games.calls.clear()
+    stats.calls.clear()
+    builder.populate(2000, 2001, delay=0)
+
+    # only the failed unit is repeated, and covers run once everything else is done
+    assert games.calls == []
+    assert stats.calls == [(2001, SeasonType.PLAYOFFS)]
+    assert covers.calls == [([2000, 2001],)]
+
+    stats.calls.clear()
+    covers.calls.clear()
+    builder.populate(2000, 2001, delay=0)
+
+    assert stats.calls == covers.calls == []
+
+
+def test_populate_only_scrapes_pending_covers(tables):
+    _, _, covers = tables
+    Journal.__table__.create(engine)
+    Journal.record(2001, SeasonType.REGULAR, "covers")
+
+    with pytest.raises(RuntimeError, match="2001 PLAYOFFS"):
+        builder.populate(2000, 2002, delay=0)
+
+    builder.populate(2000, 2002, delay=0)
+
+    assert covers.calls == [([2000, 2002],)]
@@ -0,0 +1,74 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from databall import database_builder
+
+
+def game_log(season, player_or_team_abbreviation):
+    log = pd.DataFrame(
+        {
+            "SEASON_ID": "22015",
+            "TEAM_ID": [1, 2, 3, 4],
+            "GAME_ID": ["0021500002", "0021500001", "0021500002", "0021500001"],
+            "GAME_DATE": "2015-10-27",
+            "MATCHUP": ["A vs. C", "B @ D", "C @ A", "D vs. B"],
+            "WL": ["W", "L", "L", "W"],
+            "PTS": [100, 90, 95, 99],
+        }
+    )
+
+    class Endpoint:
+        def get_data_frames(self):
+            return [log]
+
+    return Endpoint()
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_builder, "LeagueGameLog", game_log)
+
+    with closing(sqlite3.connect(tmp_path / "nba.db")) as conn:
+        yield conn
+
+
+def test_pair_games():
+    log = game_log(2015, "T").get_data_frames()[0]
+    games = database_builder.pair_games(log, 2015).set_index("ID")
+
+    assert games.index.name == "ID"
+    assert games.SEASON.tolist() == [2015, 2015]
+    assert games.loc["0021500002", ["HOME_TEAM_ID", "AWAY_TEAM_ID"]].tolist() == [1, 3]
+    assert games.loc["0021500001", ["HOME_TEAM_ID", "AWAY_TEAM_ID"]].tolist() == [4, 2]
+    assert games.HOME_WL.tolist() == ["W", "W"]
+
+
+def test_replace_loads_tables(conn):
+    database_builder.add_team_game_stats(conn, 2015, 2016, "replace", sleep=0)
+
+    assert conn.execute("SELECT COUNT(*) FROM team_game_stats").fetchone() == (8,)
+    assert conn.execute("SELECT COUNT(*) FROM games").fetchone() == (4,)
+
+
+def test_failed_replace_keeps_old_tables(conn, monkeypatch):
+    database_builder.add_team_game_stats(conn, 2015, 2015, "replace", sleep=0)
+
+    def insert_df(conn, table_name, df):
+        if table_name == "games":
+            raise sqlite3.OperationalError("disk I/O error")
+
+        original(conn, table_name, df)
+
+    original = database_builder.insert_df
+    monkeypatch.setattr(database_builder, "insert_df", insert_df)
+
+    with pytest.raises(sqlite3.OperationalError):
+        database_builder.add_team_game_stats(conn, 2015, 2016, "replace", sleep=0)
+
+    # the drop, the new team stats and the failed games insert are all rolled back
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM team_game_stats").fetchone() == (4,)
+    assert conn.execute("SELECT COUNT(*) FROM games").fetchone() == (2,)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import gaussian_kde
+
+from databall.density import DensityCache, density_grid
+
+
+def points(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.multivariate_normal([100, 105], [[40, 15], [15, 30]], n).T
+
+
+def test_density_grid_matches_gaussian_kde():
+    x, y = points()
+    density = density_grid(x, y)
+
+    xx, yy = np.meshgrid(density.x, density.y)
+    expected = gaussian_kde([x, y])([xx.ravel(), yy.ravel()]).reshape(xx.shape)
+
+    assert np.abs(density.z - expected).max() < 0.02 * expected.max()
+
+
+def test_density_grid_handles_constant_data():
+    x, y = np.full(50, 0.5), np.full(50, 0.5)
+    density = density_grid(x, y)
+
+    assert np.isfinite(density.z).all()
+    assert all(bandwidth > 0 for bandwidth in density.bandwidth)
+
+    # perfectly correlated stats are singular too
+    x = points()[0]
+    assert np.isfinite(density_grid(x, 2 * x).z).all()
+
+
+def games(seed=0):
+    x, y = points(300, seed)
+    return pd.DataFrame(
+        {
+            "SEASON": np.repeat([2015, 2016, 2017], 100),
+            "TEAM_PTS": x,
+            "TEAM_PTS_AWAY": y,
+        }
+    )
+
+
+def test_cache_hits_and_eviction():
+    data = games()
+    cache = DensityCache(maxsize=2)
+
+    first = cache.get(data, "TEAM_PTS", [2015, 2016], bins=50)
+    assert cache.get(data, "TEAM_PTS", (2015, 2016), bins=50) is first
+
+    # new data misses even with the same arguments
+    assert cache.get(games(1), "TEAM_PTS", [2015, 2016], bins=50) is not first
+
+    cache.get(data, "TEAM_PTS", [2016, 2017], bins=50)
+    assert len(cache.grids) == 2
+    assert cache.get(data, "TEAM_PTS", [2015, 2016], bins=50) is not first
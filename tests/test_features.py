@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from databall.features import windowed_stats
+
+
+def games():
+    return pd.DataFrame(
+        {
+            "SEASON": [2015] * 2 + [2016] * 4,
+            "TEAM_ID": 1,
+            "X": [10, 20, 1, 2, 3, 4],
+        }
+    )
+
+
+def test_windowed_stats_rolling_mean():
+    data = windowed_stats(games(), ["X"], window=2)
+
+    # the first game of a season is the previous season's average
+    np.testing.assert_allclose(data.X[2:], [15, 1, 1.5, 2.5])
+
+
+def test_windowed_stats_weights_recent_games():
+    data = windowed_stats(games(), ["X"], window=2, weighted=True)
+
+    # a span of two games weights each game three times the one before
+    np.testing.assert_allclose(data.X[2:], [15, 1, 7 / 4, 34 / 13])
+
+
+def test_windowed_stats_weighted_needs_window():
+    with pytest.raises(ValueError, match="window"):
+        windowed_stats(games(), ["X"], weighted=True)
+
+
+def test_windowed_stats_fills_from_unwindowed_season():
+    data = pd.concat(
+        [games(), pd.DataFrame({"SEASON": 2017, "TEAM_ID": 1, "X": [5, 6]})],
+        ignore_index=True,
+    )
+
+    full = windowed_stats(data, ["X"], window=2)
+    recent = windowed_stats(data[data.SEASON >= 2016], ["X"], window=2)
+
+    # 2016 is windowed in place before 2017 is filled from its average
+    np.testing.assert_allclose(full.X[6:], [2.5, 5])
+    pd.testing.assert_frame_equal(
+        full[full.SEASON == 2017], recent[recent.SEASON == 2017]
+    )
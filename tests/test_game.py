@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from databall.db.tables import game
+from databall.types import SeasonType
+
+
+def team_stats(season, season_type):
+    return pd.DataFrame(
+        {
+            "season_id": "22015",
+            "team_id": [1, 2, 3, 4, 5],
+            "game_id": [
+                "0021500002",
+                "0021500001",
+                "0021500002",
+                "0021500001",
+                "0021500003",
+            ],
+            "game_date": "2015-10-27",
+            "matchup": [
+                "AAA vs. CCC",
+                "BBB @ DDD",
+                "CCC @ AAA",
+                "DDD vs. BBB",
+                "EEE @ FFF",
+            ],
+            "wl": ["W", "L", "L", "W", "L"],
+        }
+    )
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    saved = []
+    monkeypatch.setattr(game, "get_team_stats", team_stats)
+    monkeypatch.setattr(game.Games, "save_df", saved.append)
+    game.team_game_log.cache_clear()
+    yield saved
+    game.team_game_log.cache_clear()
+
+
+def test_team_game_log_sorts_home_team_first(saved):
+    log = game.team_game_log(2015, SeasonType.REGULAR)
+
+    assert log.game_id.tolist()[:4] == ["0021500001"] * 2 + ["0021500002"] * 2
+    assert log.team_id.tolist()[:4] == [4, 2, 1, 3]
+    assert log.away.tolist()[:4] == [False, True, False, True]
+
+
+def test_games_pairs_home_and_away_teams(saved):
+    game.Games.populate(2015, SeasonType.REGULAR)
+
+    # the game without an opponent row is left out
+    (games,) = saved
+    assert games.id.tolist() == ["0021500001", "0021500002"]
+    assert games.home_team_id.tolist() == [4, 1]
+    assert games.away_team_id.tolist() == [2, 3]
+    assert games.matchup.tolist() == ["DDD vs. BBB", "AAA vs. CCC"]
+    assert games.season.tolist() == [2015, 2015]
+    assert (games.season_type == "REGULAR").all()
+
+
+def test_games_rejects_unpaired_rows(saved, monkeypatch):
+    def two_home_teams(season, season_type):
+        stats = team_stats(season, season_type)
+        stats.loc[2, "matchup"] = "CCC vs. AAA"
+        return stats
+
+    monkeypatch.setattr(game, "get_team_stats", two_home_teams)
+
+    with pytest.raises(ValueError, match="one home and one away team"):
+        game.Games.populate(2015, SeasonType.REGULAR)
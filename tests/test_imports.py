@@ -0,0 +1,33 @@
+import pytest
+
+from databall.benchmarks.imports import check, import_times
+
+HEAVY = ["scrapy", "matplotlib", "seaborn", "IPython"]
+
+FORBIDDEN = {
+    "databall.db": [*HEAVY, "nba_api"],
+    "databall.api": [*HEAVY, "nba_api.stats.endpoints"],
+    "databall.util": [*HEAVY, "nba_api"],
+}
+
+
+@pytest.mark.parametrize("module", FORBIDDEN)
+def test_heavy_dependencies_are_lazy(module):
+    try:
+        loaded = import_times(module)
+    except ImportError as error:
+        pytest.fail(str(error))
+
+    imported = [
+        name
+        for name in FORBIDDEN[module]
+        if any(m == name or m.startswith(f"{name}.") for m in loaded)
+    ]
+    assert not imported, f"{module} imports {', '.join(imported)}"
+
+
+def test_check_reports_modules_that_fail_to_import():
+    errors = check({"databall.missing": ["scrapy"]})
+
+    assert len(errors) == 1
+    assert errors[0].startswith("databall.missing failed to import")
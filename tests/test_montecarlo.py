@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from databall.montecarlo import bankroll_paths, flat, kelly, monte_carlo
+from databall.profit import STANDARD_ODDS, american_to_decimal
+
+
+def probabilities(n=50, seed=0):
+    return np.random.default_rng(seed).uniform(0.45, 0.75, n)
+
+
+def test_same_seed_gives_same_paths():
+    proba = probabilities()
+    first = monte_carlo(proba, n_paths=200, random_state=1)
+    second = monte_carlo(proba, n_paths=200, random_state=1)
+    other = monte_carlo(proba, n_paths=200, random_state=2)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(other)
+
+
+def test_flat_mean_matches_expected_profit():
+    proba = probabilities()
+    payout = american_to_decimal(STANDARD_ODDS) - 1
+    n_paths = 20000
+
+    # with a large enough bankroll no path is ruined, so the mean is the sum of the
+    # expected profit of every game
+    summary = monte_carlo(
+        proba,
+        rules={"flat": flat},
+        n_paths=n_paths,
+        initial=1e6,
+        random_state=0,
+    ).loc["flat"]
+    expected = 100 * np.sum(proba * payout - (1 - proba))
+    std = 100 * (1 + payout) * np.sqrt(np.sum(proba * (1 - proba)))
+
+    assert summary.risk_of_ruin == 0
+    assert abs(summary.mean_profit - expected) < 4 * std / np.sqrt(n_paths)
+
+
+def test_kelly_bankroll_never_goes_negative():
+    proba = np.concatenate([probabilities(), np.full(10, 0.99)])
+    rng = np.random.default_rng(0)
+    index = np.broadcast_to(np.arange(len(proba)), (1000, len(proba)))
+    outcomes = rng.random(index.shape) < proba
+    returns = np.where(outcomes, american_to_decimal(STANDARD_ODDS) - 1, -1.0)
+
+    # a ruin level below zero leaves the raw paths untouched
+    wealth = bankroll_paths(
+        kelly(proba, STANDARD_ODDS), index, returns, initial=100, ruin=-np.inf
+    )
+
+    assert (wealth >= 0).all()
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from databall.db import Players
+from databall.db.session import Session, engine
+from databall.db.tables import player
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    Players.__table__.drop(engine, checkfirst=True)
+    Players.__table__.create(engine)
+    calls = []
+
+    def get_players(**kwargs):
+        calls.append(kwargs)
+        return pd.DataFrame(
+            {
+                "person_id": [1, 2, 3],
+                "display_first_last": ["LeBron James", "Kobe Bryant", None],
+                "team_id": [1610612739, 1610612747, 0],
+            }
+        )
+
+    monkeypatch.setattr(player, "get_players", get_players)
+    yield calls
+    Players.__table__.drop(engine, checkfirst=True)
+
+
+def names():
+    with Session() as session:
+        rows = session.execute(select(Players.id, Players.name).order_by(Players.id))
+        return dict(rows.all())
+
+
+def test_populate_downloads_history_only_once(downloads):
+    Players.populate()
+    Players.populate()
+
+    assert [call["is_only_current_season"] for call in downloads] == [0, 1]
+    assert names() == {1: "LeBron James", 2: "Kobe Bryant"}
+
+
+def test_populate_rejects_unexpected_downloads(downloads, monkeypatch):
+    monkeypatch.setattr(player, "get_players", lambda **kwargs: pd.DataFrame())
+
+    with pytest.raises(RuntimeError, match="missing columns"):
+        Players.populate()
+
+
+def test_upsert_updates_existing_rows(downloads):
+    Players.populate()
+    Players.upsert_df(
+        pd.DataFrame({"id": [2, 4], "name": ["Kobe B. Bryant", "Yao Ming"]})
+    )
+    Players.upsert_df(pd.DataFrame({"id": [], "name": []}))
+
+    assert names() == {1: "LeBron James", 2: "Kobe B. Bryant", 4: "Yao Ming"}
+
+
+def test_add_missing_only_adds_new_players(downloads):
+    Players.populate()
+    stats = pd.DataFrame(
+        {
+            "player_id": [1, 5, 5],
+            "player_name": ["L. James", "Tim Duncan", "Tim Duncan"],
+        }
+    )
+    Players.add_missing(stats)
+
+    assert names() == {1: "LeBron James", 2: "Kobe Bryant", 5: "Tim Duncan"}
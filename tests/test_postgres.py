@@ -0,0 +1,121 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from databall.benchmarks import synthetic
+from databall.db import (
+    Covers,
+    Games,
+    Players,
+    PlayerStats,
+    Teams,
+    TeamStats,
+    postgres,
+)
+from databall.db.analytics import Analytics
+from databall.db.base import Base
+from databall.db.session import pool_options
+
+# a scratch Postgres database, since every databall table in it is dropped
+URL = os.environ.get("DATABALL_TEST_POSTGRES_URL")
+pytestmark = pytest.mark.skipif(
+    URL is None, reason="Set DATABALL_TEST_POSTGRES_URL to run against Postgres"
+)
+
+SEASONS = [2015, 2016]
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return synthetic.generate(SEASONS, teams=4, players=2, games=4)
+
+
+@pytest.fixture(scope="module")
+def engine(tables):
+    engine = create_engine(URL, **pool_options(URL))
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    # populate creates the partition of each season before loading it
+    for table in [TeamStats, PlayerStats]:
+        for season in SEASONS:
+            postgres.create_partition(engine, table.__table__, season)
+
+    for table in [Teams, Players, Games, Covers, TeamStats, PlayerStats]:
+        tables[table.__tablename__].to_sql(
+            table.__tablename__,
+            engine,
+            if_exists="append",
+            index=False,
+            method=postgres.copy_insert,
+        )
+
+    postgres.analyze(engine, [Games, TeamStats, PlayerStats])
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def scalars(engine, query):
+    with engine.connect() as connection:
+        return connection.execute(text(query)).scalars().all()
+
+
+def test_stats_tables_are_partitioned_by_season(engine):
+    for table in [TeamStats, PlayerStats]:
+        partitions = scalars(
+            engine,
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            f"WHERE parent.relname = '{table.__tablename__}' ORDER BY 1",
+        )
+
+        assert partitions == [
+            *[postgres.partition_name(table.__table__, season) for season in SEASONS],
+            f"{table.__tablename__}_default",
+        ]
+
+
+def test_copy_loads_rows_into_partitions(engine, tables):
+    for table in [Teams, Players, Games, Covers, TeamStats, PlayerStats]:
+        (count,) = scalars(engine, f"SELECT COUNT(*) FROM {table.__tablename__}")
+        assert count == len(tables[table.__tablename__])
+
+    for table in [TeamStats, PlayerStats]:
+        data = tables[table.__tablename__]
+
+        for season in SEASONS:
+            name = postgres.partition_name(table.__table__, season)
+            (count,) = scalars(engine, f"SELECT COUNT(*) FROM {name}")
+            assert count == (data.season == season).sum()
+
+
+def test_game_stats_filters_seasons(engine, tables):
+    data = Analytics(engine).game_stats(start_season=2016, stop_season=2016)
+    team_stats = tables["team_stats"]
+
+    assert set(data.SEASON) == {2016}
+    assert len(data) == (team_stats.season == 2016).sum()
+    assert (data.TEAM_ID != data.OPP_ID).all()
+
+
+def test_season_filter_skips_other_partitions(engine):
+    query = Analytics(engine).game_stats_query(start_season=2015, stop_season=2015)
+    sql = query.compile(engine, compile_kwargs={"literal_binds": True})
+    plan = "\n".join(scalars(engine, f"EXPLAIN {sql}"))
+
+    assert "team_stats_2015" in plan
+    assert "team_stats_2016" not in plan
+
+
+def test_betting_stats(engine, tables):
+    data = Analytics(engine).betting_stats(window=2, start_season=2016)
+    # spread pushes are dropped from the betting stats
+    games = tables["games"].merge(tables["covers"], left_on="id", right_on="game_id")
+    games = games[games.home_spread_result != "P"]
+
+    assert len(data) == (games.season == 2016).sum()
+    assert set(data.SEASON) == {2016}
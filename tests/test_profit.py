@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from databall.profit import bankroll, profit
+
+
+def games():
+    return pd.DataFrame(
+        {
+            "GAME_DATE": ["2020-01-01", "2020-01-01", "2020-01-02", "2020-01-02"],
+            "HOME_SPREAD_WL": ["W", "P", "L", "P"],
+            "HOME_SPREAD_WL_PRED": ["W", "W", "W", "L"],
+        }
+    )
+
+
+def test_profit_counts_pushes_as_losses():
+    days, percent, cumulative = profit(games())
+
+    assert days == ["2020-01-01", "2020-01-02"]
+    np.testing.assert_allclose(percent, [0.5, 0.25])
+    np.testing.assert_allclose(cumulative, [0, -200])
+
+
+def test_profit_returns_stake_on_push_when_asked():
+    _, percent, cumulative = profit(games(), push="P")
+
+    np.testing.assert_allclose(percent, [1.0, 0.5])
+    np.testing.assert_allclose(cumulative, [100, 0])
+
+
+def test_bankroll_pushes():
+    daily = bankroll(games(), stakes=110)
+
+    np.testing.assert_array_equal(daily.pushes, [1, 1])
+    np.testing.assert_allclose(daily.profit, [100, -110])
+    np.testing.assert_allclose(daily.cumulative_percent, [1.0, 0.5])
+    np.testing.assert_allclose(daily.roi, [100 / 220, -10 / 440])
@@ -0,0 +1,44 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from databall.report import build_report, unique_slugs
+
+
+def results(seed):
+    rng = np.random.default_rng(seed)
+    n = 40
+    return pd.DataFrame(
+        {
+            "GAME_DATE": np.repeat(pd.date_range("2020-01-01", periods=10), 4),
+            "HOME_SPREAD_WL": rng.choice(["W", "L"], n),
+            "HOME_SPREAD_WL_PRED": rng.choice(["W", "L"], n),
+        }
+    )
+
+
+def test_unique_slugs():
+    assert unique_slugs(["lr 1", "lr-1", "LR-1", "gb"]) == [
+        "lr-1",
+        "lr-1-2",
+        "LR-1-3",
+        "gb",
+    ]
+
+
+def test_build_report_keeps_colliding_runs_apart(tmp_path):
+    index = build_report(
+        {"lr 1": results(0), "lr-1": results(1)},
+        tmp_path,
+        formats=("png",),
+        n_jobs=2,
+    )
+    text = index.read_text()
+
+    assert re.findall(r"href='#([^']+)'", text) == ["lr-1", "lr-1-2"]
+
+    for slug in ["lr-1", "lr-1-2"]:
+        for figure in ["bankroll", "confusion"]:
+            assert f"src='{slug}/{figure}.png'" in text
+            assert (tmp_path / slug / f"{figure}.png").stat().st_size > 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from hyperopt import hp
+from sklearn.linear_model import LogisticRegression
+
+from databall.search import checkpoint_path, load_trials, plateau, search
+from databall.simulate import HyperOptFit
+
+
+def games(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    x = pd.DataFrame(rng.normal(size=(n, 2)), columns=["a", "b"])
+    y = (x.a + rng.normal(size=n) > 0).astype(int).to_numpy()
+    return x, y
+
+
+def test_checkpoint_path_depends_on_data(tmp_path):
+    x, y = games()
+    checkpoint = tmp_path / "trials.pkl"
+
+    path = checkpoint_path(checkpoint, x, y)
+
+    assert path.parent == tmp_path
+    assert path.suffix == ".pkl"
+    assert path == checkpoint_path(checkpoint, x.copy(), y.copy())
+    assert path != checkpoint_path(checkpoint, x.iloc[:150], y[:150])
+    assert path != checkpoint_path(checkpoint, x, 1 - y)
+
+
+def test_retrains_do_not_resume_each_other(tmp_path):
+    x, y = games()
+    checkpoint = tmp_path / "trials.pkl"
+    search = HyperOptFit(
+        {"C": hp.loguniform("C", -3, 3)},
+        max_evals=3,
+        n_splits=2,
+        checkpoint=checkpoint,
+    )
+
+    search.fit(LogisticRegression(), x.iloc[:150], y[:150])
+    search.fit(LogisticRegression(), x, y)
+
+    first = load_trials(checkpoint_path(checkpoint, x.iloc[:150], y[:150]))
+    second = load_trials(checkpoint_path(checkpoint, x, y))
+    assert len(list(tmp_path.iterdir())) == 2
+    assert len(first.trials) == len(second.trials) == 3
+
+
+def test_plateau():
+    assert plateau([0.3, 0.2, 0.2, 0.2, 0.2, 0.2, 0.2], patience=5)
+    assert not plateau([0.3, 0.2, 0.2, 0.2, 0.2, 0.2, 0.1], patience=5)
+    assert plateau([0.3, 0.2, 0.2, 0.2, 0.2, 0.2, 0.19], patience=5, tol=0.05)
+    assert not plateau([0.3, 0.2, 0.2], patience=5)
+
+
+def test_search_stops_when_loss_is_flat():
+    _, trials = search(
+        lambda params: 0.5,
+        {"C": hp.loguniform("C", -3, 3)},
+        max_evals=100,
+        patience=5,
+        random_state=0,
+    )
+
+    assert len(trials.trials) == 6
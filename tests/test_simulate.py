@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+
+from databall.simulate import fit, incremental_update, walk_forward
+
+
+def games(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    x = pd.DataFrame(rng.normal(size=(n, 3)), columns=["a", "b", "c"])
+    y = (x.a + rng.normal(scale=0.5, size=n) > 0).astype(int).to_numpy()
+    return x, y
+
+
+def test_warm_start_update_grows_ensemble():
+    x, y = games()
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    update = incremental_update(model, x, y)
+    fit(model, x.iloc[:200], y[:200])
+    trees = list(model.estimators_)
+
+    update(200, 250)
+
+    assert len(model.estimators_) == 13
+    assert model.estimators_[:10] == trees
+
+
+def test_walk_forward_leaves_model_untouched():
+    x, y = games()
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    params = model.get_params()
+    dates = np.repeat(np.arange(10), 10)
+
+    predictions = walk_forward(model, fit, x, y, 200, dates, incremental=True)
+
+    assert len(predictions) == 100
+    assert model.get_params() == params
+    assert not hasattr(model, "estimators_")
+
+
+def test_walk_forward_refits_after_first_checkpoint():
+    x, y = games()
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    dates = np.repeat(np.arange(4), 25)
+    frozen = clone(model).fit(x.iloc[:200], y[:200])
+
+    proba = walk_forward(
+        model, fit, x, y, 200, dates, incremental=True, method="predict_proba"
+    )
+
+    # the first day is predicted by the initial fit and later days by updated models
+    np.testing.assert_allclose(proba[:25], frozen.predict_proba(x.iloc[200:225]))
+    assert not np.allclose(proba[75:], frozen.predict_proba(x.iloc[275:]))
+
+
+def test_warm_start_update_grows_boosting_iterations():
+    x, y = games()
+    model = HistGradientBoostingClassifier(max_iter=10, random_state=0)
+    update = incremental_update(model, x, y)
+    fit(model, x.iloc[:200], y[:200])
+
+    update(200, 250)
+
+    assert model.max_iter == 13
+    assert model.n_iter_ == 13
+
+
+def test_walk_forward_builds_every_checkpoint_by_default():
+    x, y = games()
+    model = SGDClassifier(random_state=0)
+    sizes = []
+
+    def build(model, x, y):
+        fit(model, x, y)
+        sizes.append(len(x))
+
+    walk_forward(model, build, x, y, 200, np.repeat(np.arange(4), 25))
+
+    # the caller's model is left fitted at the last checkpoint
+    assert sizes == [200, 225, 250, 275]
+    assert hasattr(model, "coef_")
+
+
+def test_incremental_updates_reject_custom_build():
+    x, y = games()
+
+    with pytest.raises(ValueError, match="custom build"):
+        walk_forward(
+            SGDClassifier(),
+            lambda model, x, y: model.fit(x, y),
+            x,
+            y,
+            200,
+            np.repeat(np.arange(4), 25),
+            incremental=True,
+        )
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from sqlalchemy import inspect, text
+
+from databall.db import Games, TeamStats
+from databall.db.session import engine
+
+STATS = ["min", "fgm", "fga", "fg3m", "fg3a", "ftm", "fta", "oreb", "dreb", "reb"]
+STATS += ["ast", "stl", "blk", "tov", "pf", "pts", "plus_minus"]
+
+
+@pytest.fixture
+def clean():
+    for table in [TeamStats, Games]:
+        table.__table__.drop(engine, checkfirst=True)
+
+    yield
+
+    for table in [TeamStats, Games]:
+        table.__table__.drop(engine, checkfirst=True)
+
+
+def test_migrate_schema_adds_season_to_old_tables(clean):
+    Games.__table__.create(engine)
+    games = pd.DataFrame(
+        {
+            "id": ["0021500001", "0021600001"],
+            "home_team_id": [1, 1],
+            "away_team_id": [2, 2],
+            "season": [2015, 2016],
+            "season_type": ["REGULAR", "REGULAR"],
+            "game_date": pd.to_datetime(["2015-11-01", "2016-11-01"]),
+            "matchup": ["AAA vs. BBB", "AAA vs. BBB"],
+            "home_wl": ["W", "L"],
+        }
+    )
+    stats = pd.DataFrame({"game_id": games.id.repeat(2), "team_id": [1, 2, 1, 2]})
+    stats = stats.assign(**{stat: 10 for stat in STATS})
+
+    with engine.begin() as connection:
+        games.to_sql("games", connection, if_exists="append", index=False)
+        connection.execute(
+            text(
+                "CREATE TABLE team_stats (game_id TEXT, team_id INTEGER, "
+                + ", ".join(f"{stat} INTEGER" for stat in STATS)
+                + ", PRIMARY KEY (game_id, team_id))"
+            )
+        )
+        stats.to_sql("team_stats", connection, if_exists="append", index=False)
+
+    TeamStats.migrate_schema()
+
+    inspector = inspect(engine)
+    key = inspector.get_pk_constraint("team_stats")["constrained_columns"]
+    migrated = pd.read_sql("SELECT * FROM team_stats ORDER BY game_id, team_id", engine)
+
+    assert sorted(key) == ["game_id", "season", "team_id"]
+    assert migrated.season.tolist() == [2015, 2015, 2016, 2016]
+    assert (migrated[STATS] == 10).all().all()
+    assert not inspector.has_table("team_stats_migration")
+
+
+def test_migrate_schema_leaves_current_tables(clean):
+    TeamStats.migrate_schema()
+    TeamStats.__table__.create(engine)
+    TeamStats.migrate_schema()
+
+    assert "season" in [c["name"] for c in inspect(engine).get_columns("team_stats")]